@@ -2,13 +2,18 @@ import streamlit as st
 import pdfplumber
 from PIL import Image
 import io
+import os
+import tempfile
 import tabula
-from src.pdf_processing.extract_text import extract_text_from_pdf
-from src.text_processing.clean_text import clean_text
-from src.text_processing.chunk_text import chunk_text
-from src.retrieval.retrieve_chunks import initialize_chroma_collection, add_chunks_to_chroma, retrieve_similar_chunks
+from src.pdf_processing.extract_text import extract_page_texts
+from src.pdf_processing.script_sandbox import get_script_sandbox
+from src.text_processing.clean_text import DEFAULT_PIPELINE
+from src.text_processing.chunk_text import CHUNKING_VERSION, chunk_pages
+from src.retrieval.retrieve_chunks import get_bm25_index, initialize_document_collection, index_document, is_document_indexed, retrieval_cache_stats
+from src.retrieval.hybrid_search import retrieve_hybrid
 from src.embeddings.embed_text import embed_text_chunks
-from src.answer_generation.generate_answer import initialize_ollama_connection
+from src.answer_generation.generate_answer import generate_answer, initialize_ollama_connection
+from src.answer_generation.model_manager import get_model_manager
 
 # Set up Streamlit app
 st.title("Enhanced RAG App for Data Extraction from PDFs")
@@ -33,14 +38,15 @@ if uploaded_file:
         selected_texts.append((i + 1, selected_area))
 
 # Step 3: Chunking and Cleaning
-chunk_size = st.slider("Set Chunk Size", min_value=100, max_value=1000, value=500, step=50)
-chunk_overlap = st.slider("Set Chunk Overlap", min_value=0, max_value=500, value=100, step=50)
+chunk_size = st.slider("Set Chunk Size (tokens)", min_value=100, max_value=500, value=250, step=50)
+chunk_overlap = st.slider("Set Chunk Overlap (tokens)", min_value=0, max_value=chunk_size - 50, value=50, step=50)
 
 if st.button("Chunk and Clean Text"):
     if uploaded_file:
-        raw_text = extract_text_from_pdf(uploaded_file)
-        cleaned_text = clean_text(raw_text)
-        chunks = chunk_text(cleaned_text, chunk_size, chunk_overlap)
+        raw_pages = extract_page_texts(uploaded_file)
+        cleaned_pages = DEFAULT_PIPELINE.clean_pages(raw_pages)
+        # Chunked as one text, so records running over a page break stay whole
+        chunks = chunk_pages(cleaned_pages, chunk_size, chunk_overlap)
         st.session_state["chunks"] = chunks
         st.success("Text chunked and cleaned!")
     else:
@@ -49,11 +55,19 @@ if st.button("Chunk and Clean Text"):
 # Step 4: Embedding and Retrieval
 if st.button("Generate Embeddings and Retrieve Context"):
     if uploaded_file:
-        chunks = st.session_state["chunks"]
-        collection = initialize_chroma_collection("chunk_db")
-        add_chunks_to_chroma(chunks, collection)
+        # One persistent collection per document and chunk setting; re-indexing is skipped
+        collection = initialize_document_collection(uploaded_file.getvalue(), f"{chunk_size}-{chunk_overlap}-v{CHUNKING_VERSION}")
+        if not is_document_indexed(collection) and "chunks" not in st.session_state:
+            st.error("Please chunk the text first.")
+            st.stop()
+        index_document(st.session_state.get("chunks", []), collection, source=uploaded_file.name)
+        cache_stats = collection.embeddings.stats()
+        st.caption(f"Embedding cache hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} of {cache_stats['hits'] + cache_stats['misses']} chunks)")
         prompt = st.text_input("Prompt for Extraction", "What are the species and their threat levels?")
-        similar_chunks = retrieve_similar_chunks(prompt, collection, top_k=3)
+        # The lexical index for exact scientific names and category codes is saved with the collection
+        similar_chunks = retrieve_hybrid(prompt, collection, get_bm25_index(collection), top_k=3)
+        query_stats = retrieval_cache_stats(collection)["query_embeddings"]
+        st.caption(f"Query embedding cache: {query_stats['hits']} hits, {query_stats['misses']} misses")
         context = " ".join([result["chunk"] for result in similar_chunks])
         st.session_state["context"] = context
         st.success("Context retrieved from embeddings!")
@@ -62,6 +76,16 @@ if st.button("Generate Embeddings and Retrieve Context"):
 
 ## Step 5: LLM Prompting and Script Generation
 llm_model = st.selectbox("Select LLM Model", ["llama3.2:latest", "llama3.2:3b-instruct-q2_K", "qwen2.5:latest"])
+# Preload the selected model, so switching models does not delay the first answer
+# A failed preload is remembered too, so an unreachable server does not block every rerun
+if st.session_state.get("warm_model") != llm_model:
+    with st.spinner(f"Loading {llm_model}..."):
+        warmup = get_model_manager().warmup(llm_model)
+    st.session_state["warm_model"] = llm_model
+    if warmup:
+        st.caption(f"{llm_model} ready (load {warmup['load_seconds']:.1f}s)")
+    else:
+        st.caption(f"Could not preload {llm_model}; it loads with the first request.")
 if st.button("Generate Extraction Script"):
     if uploaded_file:
         context = st.session_state["context"]
@@ -70,20 +94,37 @@ if st.button("Generate Extraction Script"):
         
         # Send selected info and prompt to LLM
         full_prompt = f"Generate a Python script to extract data based on selected areas:\n{selected_info}\nContext:\n{context}"
-        answer = generate_answer(ollama_base_url, full_prompt, context)
+        st.write("Generated Python Script:")
+        script_placeholder = st.empty()
+        streamed = []
+        def show_token(token):
+            streamed.append(token)
+            script_placeholder.code("".join(streamed), language="python")
+        answer = generate_answer(ollama_base_url, full_prompt, llm_model, on_token=show_token)
         
         # Display generated script
-        st.write("Generated Python Script:")
-        st.code(answer, language="python")
+        script_placeholder.code(answer, language="python")
         st.session_state["generated_script"] = answer
     else:
         st.error("Please upload a PDF file first.")
 
 # Step 6: Run Generated Script and Display Results
 if st.button("Run Generated Script"):
-    if "generated_script" in st.session_state:
-        exec(st.session_state["generated_script"])  # Caution: Ensure safety when running code
-        st.write("Script executed. Check output for extracted data.")
+    if "generated_script" in st.session_state and uploaded_file:
+        # Run in a sandbox worker, with the uploaded PDF as the script's first argument
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf_file:
+            temp_pdf_file.write(uploaded_file.getvalue())
+        try:
+            result = get_script_sandbox().run(st.session_state["generated_script"], [temp_pdf_file.name])
+        finally:
+            os.remove(temp_pdf_file.name)
+        if result.ok:
+            st.write("Script executed. Check output for extracted data.")
+            if result.stdout:
+                st.text_area("Script Output", result.stdout, height=200)
+        else:
+            st.error("Error running script:")
+            st.text(result.error)
     else:
         st.error("Please generate a script first.")
 
@@ -1,11 +1,14 @@
 import streamlit as st
-import pdfplumber
 import re
 import os
-import subprocess
 import tempfile
 import tempfile
+from src.answer_generation.code_cleaner import clean_script_code
 from src.answer_generation.generate_answer import generate_answer, initialize_ollama_connection
+from src.answer_generation.model_manager import get_model_manager
+from src.pdf_processing.extract_text import document_cache_key, extract_page_text, get_page_count
+from src.pdf_processing.script_sandbox import get_script_sandbox
+from src.pdf_processing.script_shards import SCRIPT_ARGS_INSTRUCTIONS, reads_script_args, run_sharded
 from streamlit import session_state
 from streamlit_pdf_viewer import pdf_viewer
 
@@ -26,16 +29,18 @@ if uploaded_file:
     binary_data=uploaded_file.read()
     pdf_viewer(input=binary_data, width=700, height=800, render_text=True)
 
-    # Reload the file for pdfplumber to extract text
-    uploaded_file.seek(0)
-    with pdfplumber.open(uploaded_file) as pdf:
-        total_pages = len(pdf.pages)
+    # Page count and page text come from the extraction cache on reruns; the
+    # upload is hashed once, not on every rerun
+    if st.session_state.get("cache_key_file_id") != uploaded_file.file_id:
+        st.session_state["cache_key"] = document_cache_key(uploaded_file)
+        st.session_state["cache_key_file_id"] = uploaded_file.file_id
+    total_pages = get_page_count(uploaded_file, cache_key=st.session_state["cache_key"])
 
     # Step 3: Page Selection
     page_num = st.number_input("Select Page Number to Extract Text", min_value=1, max_value=total_pages, step=1)
         
         # Extract text from the selected page
-    page_text = pdf.pages[page_num - 1].extract_text()
+    page_text = extract_page_text(uploaded_file, page_num, cache_key=st.session_state["cache_key"])
     if page_text:
             st.text_area("Extracted Text from Selected Page", page_text, height=300)
     else:
@@ -51,7 +56,6 @@ script_path = "scraper.py"
 # Read the entire file into a string
 with open(script_path, "r") as file:
     original_script = file.read()
-input_path = "/home/ulicny/data.pdf"
 output_path = st.text_input("Specify Output Path (e.g., /tmp/scraped_data.csv or /tmp/scraped_data.json)")
 
 #Define Prompt for Data Extraction
@@ -64,8 +68,8 @@ if uploaded_file and "page_text" in st.session_state:
 You are tasked with writing a simple python script to extract specified data from a PDF.
 Sample page to understand the text structure: {context}
 The goal is to extract this data: {user_instruction}
-Use this strin {input_path} as output path.
-Use this string {output_path} as output path.
+{SCRIPT_ARGS_INSTRUCTIONS}
+Write the output in the format of this file name: {os.path.basename(output_path)}
 Important:
 - provide well formatted codeblock, no instructions, no explainers, no comments.
 - format the code as a single markdown formatted codeblock.
@@ -82,10 +86,28 @@ Important:
     
     # Choose LLM model
     llm_model = st.selectbox("Select LLM Model", llm_models)
+    # Preload the selected model, so switching models does not delay the first answer
+    # A failed preload is remembered too, so an unreachable server does not block every rerun
+    if st.session_state.get("warm_model") != llm_model:
+        with st.spinner(f"Loading {llm_model}..."):
+            warmup = get_model_manager().warmup(llm_model)
+        st.session_state["warm_model"] = llm_model
+        if warmup:
+            st.caption(f"{llm_model} ready (load {warmup['load_seconds']:.1f}s)")
+        else:
+            st.caption(f"Could not preload {llm_model}; it loads with the first request.")
+    regenerate = st.checkbox("Regenerate (ignore cached answer)")
     
     if st.button("Generate Python Script"):
         base_url = initialize_ollama_connection()  # Connect to Ollama API
-        response_text = generate_answer(base_url, question, llm_model)
+        # Show the answer while it is generated
+        response_placeholder = st.empty()
+        streamed = []
+        def show_token(token):
+            streamed.append(token)
+            response_placeholder.markdown("".join(streamed))
+        response_text = generate_answer(base_url, question, llm_model, on_token=show_token, use_cache=not regenerate)
+        response_placeholder.empty()
         
         if "Error" in response_text:
             st.error(response_text)
@@ -104,91 +126,42 @@ Important:
                 st.warning("No code block found in response.")
 
 
-def clean_script_code(script_code):
-    lines = script_code.split("\n")
-    cleaned_lines = []
-    current_line = ""
-    string_state = "outside_string"
-    quote_char = None
-
-    for line in lines:
-        if string_state == "outside_string":
-            if "lines = text.split(\"\\n\")" in line:
-                cleaned_lines.append(line)
-                continue
-            stripped_line = line.strip()
-            if stripped_line.startswith("'''") or stripped_line.startswith('"""'):
-                if stripped_line.endswith("'''") or stripped_line.endswith('"""'):
-                    # Single-line triple-quoted string
-                    cleaned_lines.append(line)
-                else:
-                    # Multi-line triple-quoted string
-                    current_line = line
-                    quote_char = stripped_line[:3]
-                    string_state = "inside_triple_quote"
-            elif stripped_line.startswith("'") or stripped_line.startswith('"'):
-                if stripped_line.endswith("'") or stripped_line.endswith('"'):
-                    # Single-line string
-                    cleaned_lines.append(line)
-                else:
-                    # Multi-line string
-                    current_line = line
-                    quote_char = stripped_line[0]
-                    string_state = "inside_single_quote" if quote_char == "'" else "inside_double_quote"
-            else:
-                # Non-string line
-                line = line.replace("\\n", "\n").replace("\\t", "\t")
-                cleaned_lines.append(line)
-        else:
-            current_line += "\n" + line
-            if string_state == "inside_single_quote":
-                if "'" in line and line[line.index("'")-1] != "\\":
-                    string_state = "outside_string"
-                    cleaned_lines.append(current_line)
-                    current_line = ""
-            elif string_state == "inside_double_quote":
-                if '"' in line and line[line.index('"')-1] != "\\":
-                    string_state = "outside_string"
-                    cleaned_lines.append(current_line)
-                    current_line = ""
-            elif string_state == "inside_triple_quote":
-                if stripped_line.endswith("'''") or stripped_line.endswith('"""'):
-                    string_state = "outside_string"
-                    cleaned_lines.append(current_line)
-                    current_line = ""
-
-    return "\n".join(cleaned_lines)
-
-# Execute the Generated Script with Subprocess
-def run_generated_script(script_code, pdf_file_path, output_path):
+# Execute the Generated Script in a Sandbox Worker
+def run_generated_script(script_code, pdf_file_path, output_path, sharded=False):
     cleaned_script_code = clean_script_code(script_code)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".py") as temp_script_file:
-        temp_script_file.write(cleaned_script_code.encode("utf-8"))
-        temp_script_file_path = temp_script_file.name
+    if sharded:
+        # Page-range shards of the PDF run in parallel; their outputs are merged in page order
+        result = run_sharded(cleaned_script_code, pdf_file_path, output_path)
+    else:
+        result = get_script_sandbox().run(cleaned_script_code, [pdf_file_path, output_path, "0"], output_path=output_path)
 
-    try:
-        result = subprocess.run(
-            ["python", temp_script_file_path, pdf_file_path, output_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        st.success(f"Script executed successfully. Data saved at {output_path}")
+    if result.ok:
+        st.success(f"Script executed successfully in {result.seconds:.1f}s. Data saved at {os.path.abspath(output_path)}")
         if result.stdout:
             st.text_area("Script Output", result.stdout, height=200)
         if result.stderr:
             st.text_area("Script Errors", result.stderr, height=200)
-
-    except subprocess.CalledProcessError as e:
+        if result.output is not None:
+            st.download_button("Download Output", result.output, file_name=os.path.basename(output_path))
+    else:
         st.error("Error running script:")
-        st.text(e.stderr)
+        st.text(result.error)
+        if result.stderr:
+            st.text(result.stderr)
     
 
 if "generated_script" in st.session_state and output_path:
-    if st.button("Run Script for Entire PDF"):
+    run_whole = st.button("Run Script for Entire PDF")
+    # Shards only work for scripts that take their paths from the command line
+    run_shards = False
+    if reads_script_args(clean_script_code(st.session_state["generated_script"])):
+        run_shards = st.button("Run Script in Parallel Shards")
+    if run_whole or run_shards:
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf_file:
-            temp_pdf_file.write(uploaded_file.read())
+            temp_pdf_file.write(uploaded_file.getvalue())
             pdf_file_path = temp_pdf_file.name
         
-        run_generated_script(st.session_state["generated_script"], pdf_file_path, output_path)
\ No newline at end of file
+        try:
+            run_generated_script(st.session_state["generated_script"], pdf_file_path, output_path, sharded=run_shards)
+        finally:
+            os.remove(pdf_file_path)
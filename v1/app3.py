@@ -1,12 +1,16 @@
 import requests
 import streamlit as st
 import json
-import pdfplumber
 import re
-import subprocess
+import os
 import tempfile
 import logging
+from src.answer_generation.code_cleaner import clean_script_code
 from src.answer_generation.generate_answer import generate_answer, initialize_ollama_connection
+from src.answer_generation.model_manager import get_model_manager
+from src.pdf_processing.extract_text import document_cache_key, extract_page_text, get_page_count
+from src.pdf_processing.script_sandbox import get_script_sandbox
+from src.pdf_processing.script_shards import SCRIPT_ARGS_INSTRUCTIONS
 from streamlit_pdf_viewer import pdf_viewer
 
 # Set up Streamlit app
@@ -20,16 +24,18 @@ if uploaded_file:
     binary_data=uploaded_file.read()
     pdf_viewer(input=binary_data, width=700, height=800, render_text=True)
 
-    # Reload the file for pdfplumber to extract text
-    uploaded_file.seek(0)
-    with pdfplumber.open(uploaded_file) as pdf:
-        total_pages = len(pdf.pages)
+    # Page count and page text come from the extraction cache on reruns; the
+    # upload is hashed once, not on every rerun
+    if st.session_state.get("cache_key_file_id") != uploaded_file.file_id:
+        st.session_state["cache_key"] = document_cache_key(uploaded_file)
+        st.session_state["cache_key_file_id"] = uploaded_file.file_id
+    total_pages = get_page_count(uploaded_file, cache_key=st.session_state["cache_key"])
 
     # Step 3: Page Selection
     page_num = st.number_input("Select Page Number to Extract Text", min_value=1, max_value=total_pages, step=1)
         
         # Extract text from the selected page
-    page_text = pdf.pages[page_num - 1].extract_text()
+    page_text = extract_page_text(uploaded_file, page_num, cache_key=st.session_state["cache_key"])
     if page_text:
             st.text_area("Extracted Text from Selected Page", page_text, height=300)
     else:
@@ -60,6 +66,8 @@ Data to extract: {user_instruction}
 
 Sample page to understand text structure: {context}
 
+{SCRIPT_ARGS_INSTRUCTIONS}
+
 Instead of \n for new lines, use the actual newline character. This is very important.
 Make sure the updated code will be able to run as a standalone script.
 In the codeblock, ensure correct indentation and formatting.
@@ -81,11 +89,29 @@ In the codeblock, ensure correct indentation and formatting.
     
     # Choose LLM model
     selected_llm_model = st.selectbox("Select LLM Model", llm_models)
+    # Preload the selected model, so switching models does not delay the first answer
+    # A failed preload is remembered too, so an unreachable server does not block every rerun
+    if st.session_state.get("warm_model") != selected_llm_model:
+        with st.spinner(f"Loading {selected_llm_model}..."):
+            warmup = get_model_manager().warmup(selected_llm_model)
+        st.session_state["warm_model"] = selected_llm_model
+        if warmup:
+            st.caption(f"{selected_llm_model} ready (load {warmup['load_seconds']:.1f}s)")
+        else:
+            st.caption(f"Could not preload {selected_llm_model}; it loads with the first request.")
+    regenerate = st.checkbox("Regenerate (ignore cached answer)")
     
     # Generate the answer from the LLM API
     if st.button("Generate Python Script"):
         base_url = initialize_ollama_connection()
-        response_text = generate_answer(base_url, question, selected_llm_model)
+        # Show the answer while it is generated
+        response_placeholder = st.empty()
+        streamed = []
+        def show_token(token):
+            streamed.append(token)
+            response_placeholder.text("".join(streamed))
+        response_text = generate_answer(base_url, question, selected_llm_model, on_token=show_token, use_cache=not regenerate)
+        response_placeholder.empty()
 
         # Display the raw response text for debugging purposes
         st.write("Raw Response from LLM:", response_text)  # Display in Streamlit
@@ -96,7 +122,7 @@ In the codeblock, ensure correct indentation and formatting.
             code_start = response_text.find("###START_CODE###") + len("###START_CODE###")
             code_end = response_text.find("###END_CODE###", code_start)
             if code_start != -1 and code_end != -1:
-                generated_code = response_text[code_start:code_end].strip()
+                generated_code = clean_script_code(response_text[code_start:code_end])
                 st.session_state["generated_script"] = generated_code
             else:
                 st.error("Error: Code markers not found in the response text.")
@@ -109,37 +135,32 @@ In the codeblock, ensure correct indentation and formatting.
             logging.error("Failed to decode JSON:", response_text)
             st.error("Error: Unexpected response format from Ollama API.")
 
-# Execute the Generated Script with Subprocess
+# Execute the Generated Script in a Sandbox Worker
 def run_generated_script(script_code, pdf_file_path, output_path):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".py") as temp_script_file:
-        temp_script_file.write(script_code.encode("utf-8"))
-        temp_script_file_path = temp_script_file.name
-
-    try:
-        result = subprocess.run(
-            ["python", temp_script_file_path, pdf_file_path, output_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        st.success(f"Script executed successfully. Data saved at {output_path}")
+    result = get_script_sandbox().run(script_code, [pdf_file_path, output_path, "0"], output_path=output_path)
+
+    if result.ok:
+        st.success(f"Script executed successfully in {result.seconds:.1f}s. Data saved at {os.path.abspath(output_path)}")
         if result.stdout:
             st.text_area("Script Output", result.stdout, height=200)
         if result.stderr:
             st.text_area("Script Errors", result.stderr, height=200)
-
-    except subprocess.CalledProcessError as e:
+        if result.output is not None:
+            st.download_button("Download Output", result.output, file_name=os.path.basename(output_path))
+    else:
         st.error("Error running script:")
-        st.text(e.stderr)
+        st.text(result.error)
+        if result.stderr:
+            st.text(result.stderr)
     
-    finally:
-        temp_script_file.close()
 
 if "generated_script" in st.session_state and output_path:
     if st.button("Run Script for Entire PDF"):
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf_file:
-            temp_pdf_file.write(uploaded_file.read())
+            temp_pdf_file.write(uploaded_file.getvalue())
             pdf_file_path = temp_pdf_file.name
         
-        run_generated_script(st.session_state["generated_script"], pdf_file_path, output_path)
\ No newline at end of file
+        try:
+            run_generated_script(st.session_state["generated_script"], pdf_file_path, output_path)
+        finally:
+            os.remove(pdf_file_path)
@@ -0,0 +1,237 @@
+# batch_scraper.py
+#
+# Extracts species records from many Red Book PDFs into one CSV or Parquet file.
+#
+# Inputs are a directory of PDFs, or a manifest: the CSV written by scrape_web.py
+# (its "pdf_name" column, resolved against --pdf-dir) or a text file with one PDF
+# path per line. Pages are parsed across a pool of worker processes. The records
+# of each PDF are kept in a part file under --parts-dir, so PDFs that have not
+# changed since their part was written are skipped on the next run. Part files are
+# named after the parser version, so a changed parser re-parses every PDF.
+#
+#     python batch_scraper.py pdfs/ --output redbooks_species.csv
+#     python batch_scraper.py redbooks_data.csv --pdf-dir pdfs --output redbooks_species.parquet
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz  # PyMuPDF
+
+from src.pdf_processing import record_parser
+from src.pdf_processing.record_parser import FIELDNAMES, parse_pdf_records
+
+COLUMNS = ["Source File", "Page"] + FIELDNAMES
+DEFAULT_PARTS_DIR = os.path.join("data", "cache", "batch_parts")
+
+
+def _parser_version():
+    # Hash of the record parser's source and the output columns: any change to
+    # either makes the part files written before it stale
+    digest = hashlib.sha1(",".join(COLUMNS).encode("utf-8"))
+    with open(record_parser.__file__, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:8]
+
+
+PARSER_VERSION = _parser_version()
+
+
+def find_inputs(source, pdf_dir="pdfs"):
+    """
+    Lists the PDF files of a directory or manifest.
+
+    Parameters:
+    source (str): A directory, a CSV manifest with a "pdf_name" or "path" column,
+        or a text file with one path per line.
+    pdf_dir (str): Directory that relative paths in a manifest are resolved against.
+
+    Returns:
+    list of str: Paths of the PDF files that exist, sorted and without duplicates.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(source)
+            for name in names
+            if name.lower().endswith(".pdf")
+        ]
+    elif source.lower().endswith(".csv"):
+        with open(source, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        column = "pdf_name" if rows and "pdf_name" in rows[0] else "path"
+        paths = [os.path.join(pdf_dir, row[column]) for row in rows if row.get(column)]
+    else:
+        with open(source, encoding="utf-8") as f:
+            paths = [os.path.join(pdf_dir, line.strip()) for line in f if line.strip()]
+
+    existing = []
+    for path in sorted(set(paths)):
+        if os.path.isfile(path):
+            existing.append(path)
+        else:
+            print(f"Skipping missing file: {path}")
+    return existing
+
+
+def _part_prefix(pdf_path, parts_dir):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    digest = hashlib.sha1(os.path.abspath(pdf_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(parts_dir, f"{stem}-{digest}")
+
+
+def part_path(pdf_path, parts_dir):
+    """
+    Returns the path of the part file holding the records of one PDF, as parsed
+    by the current parser version.
+    """
+    return f"{_part_prefix(pdf_path, parts_dir)}-{PARSER_VERSION}.csv"
+
+
+def is_up_to_date(pdf_path, parts_dir):
+    part = part_path(pdf_path, parts_dir)
+    return os.path.exists(part) and os.path.getmtime(part) >= os.path.getmtime(pdf_path)
+
+
+def write_part(pdf_path, records, parts_dir):
+    """
+    Writes the records of one PDF to its part file, replacing it atomically.
+    """
+    part = part_path(pdf_path, parts_dir)
+    with open(part + ".tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        source = os.path.basename(pdf_path)
+        for record in records:
+            writer.writerow({"Source File": source, **record})
+    os.replace(part + ".tmp", part)
+    remove_parts(pdf_path, parts_dir, keep=part)
+
+
+def remove_parts(pdf_path, parts_dir, keep=None):
+    """
+    Removes the part files of a PDF, of any parser version, except `keep`.
+    """
+    for part in glob.glob(glob.escape(_part_prefix(pdf_path, parts_dir)) + "*.csv"):
+        if part != keep:
+            os.remove(part)
+
+
+def _page_ranges(page_count, pages_per_task):
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def parse_documents(pdf_paths, parts_dir, max_workers=None, pages_per_task=32):
+    """
+    Parses PDFs on a pool of worker processes and writes one part file per PDF.
+
+    Each PDF is split into blocks of `pages_per_task` pages, so the pages of large
+    and small documents are spread evenly over the workers.
+
+    Returns:
+    int: Number of pages parsed.
+    """
+    tasks = []
+    for path in pdf_paths:
+        try:
+            with fitz.open(path) as document:
+                page_count = document.page_count
+        except Exception as e:
+            print(f"Skipping unreadable PDF {path}. Error:", e)
+            remove_parts(path, parts_dir)
+            continue
+        tasks.extend((path, start, end) for start, end in _page_ranges(page_count, pages_per_task))
+        if page_count == 0:
+            write_part(path, [], parts_dir)
+
+    pending = {}  # PDF path -> number of unfinished blocks
+    for path, _, _ in tasks:
+        pending[path] = pending.get(path, 0) + 1
+    results = {path: {} for path in pending}
+    failed = set()
+    pages = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(parse_pdf_records, path, start, end): (path, start, end) for path, start, end in tasks}
+        for future in as_completed(futures):
+            path, start, end = futures[future]
+            try:
+                results[path][start] = future.result()
+                pages += end - start
+            except Exception as e:
+                print(f"Failed to parse pages {start + 1}-{end} of {path}. Error:", e)
+                failed.add(path)
+            pending[path] -= 1
+            if pending[path] == 0:
+                blocks = results.pop(path)
+                if path in failed:
+                    # Leave no part from an earlier run, so the merge does not pick it up
+                    remove_parts(path, parts_dir)
+                else:
+                    write_part(path, [record for start in sorted(blocks) for record in blocks[start]], parts_dir)
+    return pages
+
+
+def merge_parts(pdf_paths, parts_dir, output_path):
+    """
+    Combines the part files of the given PDFs into one CSV or Parquet file.
+
+    Returns:
+    int: Number of records written.
+    """
+    parts = [part_path(path, parts_dir) for path in pdf_paths if os.path.exists(part_path(path, parts_dir))]
+    if output_path.lower().endswith(".parquet"):
+        import pandas as pd
+
+        frames = [pd.read_csv(part, dtype=str, keep_default_na=False) for part in parts]
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+        table["Page"] = table["Page"].astype(int)
+        table.to_parquet(output_path, index=False)
+        return len(table)
+
+    count = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        for part in parts:
+            with open(part, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for row in reader:
+                    writer.writerow(row)
+                    count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract species records from many Red Book PDFs.")
+    parser.add_argument("source", help="Directory of PDFs, or a manifest (CSV from scrape_web.py or a list of paths).")
+    parser.add_argument("-o", "--output", default="redbooks_species.csv", help="Output .csv or .parquet (requires pyarrow) file.")
+    parser.add_argument("--pdf-dir", default="pdfs", help="Directory that manifest paths are relative to.")
+    parser.add_argument("--parts-dir", default=DEFAULT_PARTS_DIR, help="Directory for per-PDF part files.")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--pages-per-task", type=int, default=32, help="Pages parsed per worker task.")
+    parser.add_argument("--force", action="store_true", help="Re-parse PDFs even if their part file is up to date.")
+    args = parser.parse_args()
+
+    os.makedirs(args.parts_dir, exist_ok=True)
+    pdf_paths = find_inputs(args.source, args.pdf_dir)
+    stale = [path for path in pdf_paths if args.force or not is_up_to_date(path, args.parts_dir)]
+    print(f"{len(pdf_paths)} PDFs, {len(pdf_paths) - len(stale)} up to date, {len(stale)} to parse")
+
+    started = time.perf_counter()
+    pages = parse_documents(stale, args.parts_dir, args.workers, args.pages_per_task) if stale else 0
+    elapsed = time.perf_counter() - started
+    if pages:
+        print(f"Parsed {pages} pages in {elapsed:.1f}s ({pages / elapsed:.1f} pages/s)")
+
+    count = merge_parts(pdf_paths, args.parts_dir, args.output)
+    print(f"Wrote {count} records to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_clean_text.py
+#
+# Compares the previous clean_text + chunk_text whitespace handling (three regex
+# passes over the whole document) with the fused CleaningPipeline.
+#
+# Run from the v1 directory:
+#     python -m benchmarks.bench_clean_text [path/to/file.pdf]
+
+import random
+import re
+import sys
+import timeit
+
+from src.text_processing.clean_text import DEFAULT_PIPELINE, DEFAULT_RULES, CleaningPipeline, clean_text
+
+
+def legacy_clean_and_normalize(text):
+    # clean_text before the fused pipeline
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'(?<!\w)-\s+', '', text)
+    text = text.strip()
+    # chunk_text repeated the whitespace collapse before slicing
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def synthetic_pages(count=300, seed=0):
+    random.seed(seed)
+    words = ["Scientific", "Name:", "Panthera", "tigris", "habitat", "loss", "<EN>", "population",
+             "declining.", "forest", "Bangladesh", "the", "of", "and", "species", "ﬁsh", "recorded"]
+    pages = []
+    for i in range(1, count + 1):
+        lines = []
+        for _ in range(50):
+            line = " ".join(random.choice(words) for _ in range(12))
+            if random.random() < 0.1:
+                line += " threat-"  # Word hyphenated across the line break
+            lines.append(line)
+        pages.append(f"Red List of Bangladesh\n{i}\n" + "\n".join(lines) + f"\nPage {i}\n")
+    return pages
+
+
+def load_pages(path):
+    import fitz  # PyMuPDF
+    with fitz.open(path) as pdf_document:
+        return [page.get_text() for page in pdf_document]
+
+
+def main():
+    pages = load_pages(sys.argv[1]) if len(sys.argv) > 1 else synthetic_pages()
+    text = "".join(pages)
+    print(f"{len(pages)} pages, {len(text) / 1e6:.2f} MB of text")
+
+    # Only the rules the legacy functions had, to compare fusing alone
+    legacy_rules = CleaningPipeline(
+        rules=[rule for rule in DEFAULT_RULES if rule[0] in ("dash", "whitespace")], remove_headers=False
+    )
+
+    runs = 10
+    timings = {
+        "fused, legacy rules only": lambda: legacy_rules.clean(text),
+        "legacy clean_text + chunk_text normalize": lambda: legacy_clean_and_normalize(text),
+        "fused clean_text (whole document)": lambda: clean_text(text),
+        "fused clean_pages (with header removal)": lambda: DEFAULT_PIPELINE.clean_pages(pages),
+    }
+    for name, func in timings.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=runs))
+        print(f"{name:45s} {seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# benchmarks/bench_code_cleaner.py
+#
+# Checks and times the shared clean_script_code against the previous per-line
+# cleaner of code_cleaner.py:
+#
+# - corpus: the LLM answers in data/code_cleaner_corpus (see its README.md) must
+#   clean to valid Python;
+# - fuzz: scripts of this repo, escaped and wrapped the ways models return code,
+#   must clean back to the same syntax tree;
+# - scaling: time on answers of growing length.
+#
+# Run from the v1 directory:
+#     python -m benchmarks.bench_code_cleaner [--seed N] [--cases N]
+
+import argparse
+import ast
+import glob
+import io
+import json
+import os
+import random
+import re
+import timeit
+import tokenize
+import warnings
+
+from src.answer_generation.code_cleaner import clean_script_code, syntax_error
+
+CORPUS_DIR = os.path.join("data", "code_cleaner_corpus")
+FUZZ_SOURCES = [
+    "test.py",
+    "batch_scraper.py",
+    "scrape_web.py",
+    os.path.join("src", "pdf_processing", "record_parser.py"),
+    os.path.join("src", "pdf_processing", "script_shards.py"),
+]
+
+
+def legacy_clean_script_code(script_code):
+    # code_cleaner.clean_script_code before the shared cleaner
+    if not script_code:
+        return ""
+    lines = script_code.split("\n")
+    cleaned_lines = []
+    for line in lines:
+        if "lines = text.split(\"\\n\")" in line:
+            cleaned_lines.append(line)
+        else:
+            line = line.replace("\\n", "\n")
+            line = re.sub(r'\\"', '"', line)
+            line = line.replace("\\t", "\t")
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", DeprecationWarning)
+                    line = bytes(line, "utf-8").decode("unicode_escape")
+            except UnicodeDecodeError:
+                pass
+            cleaned_lines.append(line)
+
+    balanced_lines = []
+    open_quote = None
+    current_line = ""
+    for line in cleaned_lines:
+        if not line:
+            balanced_lines.append("")
+            continue
+        if open_quote:
+            current_line += "\n" + line
+            quote_positions = [i for i, char in enumerate(line) if char == open_quote]
+            for pos in quote_positions:
+                if pos > 0 and line[pos-1] != "\\":
+                    balanced_lines.append(current_line)
+                    current_line = line[pos+1:]
+                    open_quote = None
+                    break
+            if open_quote:
+                continue
+        else:
+            current_line = line
+        for char in ['"', "'"]:
+            quote_positions = [i for i, c in enumerate(current_line) if c == char]
+            if len(quote_positions) % 2 == 1:
+                last_quote_pos = quote_positions[-1]
+                if last_quote_pos == 0 or current_line[last_quote_pos-1] != "\\":
+                    open_quote = char
+                    break
+        if not open_quote:
+            balanced_lines.append(current_line)
+        else:
+            current_line = line
+    if current_line:
+        balanced_lines.append(current_line)
+    return "\n".join(balanced_lines)
+
+
+def same_tree(code, source):
+    try:
+        return ast.dump(ast.parse(code)) == ast.dump(ast.parse(source))
+    except (SyntaxError, ValueError):
+        return False
+
+
+def json_escaped(source, rng):
+    return json.dumps(source, ensure_ascii=rng.random() < 0.5)[1:-1]
+
+
+def double_escaped(source, rng):
+    return json_escaped(json_escaped(source, rng), rng)
+
+
+def json_object(source, rng):
+    return json.dumps({"script": source, "explanation": "It writes one row per record."})
+
+
+def fenced(source, rng):
+    return f"Here is the script:\n\n```python\n{source}\n```\n\nIt writes one row per record."
+
+
+def partly_escaped(source, rng):
+    # Joins some lines with a literal "\n" and escapes the quotes of some plain
+    # strings, as models do when they half-escape code
+    tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    lines = source.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    edits = []  # (start, end, replacement)
+    for token in tokens:
+        start = offsets[token.start[0] - 1] + token.start[1]
+        end = offsets[token.end[0] - 1] + token.end[1]
+        if token.type in (tokenize.NEWLINE, tokenize.NL) and token.string == "\n" and rng.random() < 0.3:
+            edits.append((start, end, "\\n"))
+        elif (token.type == tokenize.STRING and re.fullmatch(r'"[^"\\\n]*"', token.string)
+              and rng.random() < 0.5):
+            edits.append((start, end, '\\"' + token.string[1:-1] + '\\"'))
+    out = []
+    pos = 0
+    for start, end, replacement in edits:
+        out.append(source[pos:start])
+        out.append(replacement)
+        pos = end
+    out.append(source[pos:])
+    return "".join(out)
+
+
+ENCODINGS = {
+    "json-escaped": json_escaped,
+    "fenced": fenced,
+    "fenced json-escaped": lambda source, rng: fenced(json_escaped(source, rng), rng),
+    "partly escaped": partly_escaped,
+    "double-escaped": double_escaped,
+    "json object": json_object,
+}
+
+
+def check_corpus():
+    print(f"Corpus ({CORPUS_DIR}):")
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            answer = f.read()
+        legacy = "valid" if syntax_error(legacy_clean_script_code(answer)) is None else "broken"
+        error = syntax_error(clean_script_code(answer))
+        cleaned = "valid" if error is None else f"broken ({error.msg}, line {error.lineno})"
+        print(f"  {os.path.basename(path):32s} legacy {legacy:7s} shared {cleaned}")
+
+
+def fuzz(cases, seed):
+    rng = random.Random(seed)
+    sources = []
+    for path in FUZZ_SOURCES:
+        with open(path, encoding="utf-8") as f:
+            sources.append(f.read())
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            sources.append(clean_script_code(f.read()))
+
+    print(f"Fuzz ({cases} cases per encoding, seed {seed}): same syntax tree after cleaning")
+    for name, encode in ENCODINGS.items():
+        legacy = shared = 0
+        for _ in range(cases):
+            source = rng.choice(sources)
+            answer = encode(source, rng)
+            legacy += same_tree(legacy_clean_script_code(answer), source)
+            shared += same_tree(clean_script_code(answer), source)
+        print(f"  {name:20s} legacy {legacy:4d}/{cases}  shared {shared:4d}/{cases}")
+
+
+def scaling(runs=3):
+    # A script that embeds a sample page in a triple-quoted string, as prompted
+    # answers often do, escaped into one line
+    with open(os.path.join(CORPUS_DIR, "escaped_single_line.txt"), encoding="utf-8") as f:
+        answer = f.read()
+    print("Scaling (escaped answer with an embedded page of N lines):")
+    for lines in (50, 200, 800, 3200):
+        page = "\\n".join(f"Scientific Name: Genus{i} species{i} (Author, 1758) \\u003cEN\\u003e" for i in range(lines))
+        long_answer = f'PAGE = \\"\\"\\"{page}\\"\\"\\"\\n' + answer
+        legacy_time = min(timeit.repeat(lambda: legacy_clean_script_code(long_answer), number=1, repeat=runs))
+        shared_time = min(timeit.repeat(lambda: clean_script_code(long_answer), number=1, repeat=runs))
+        print(f"  {lines:5d} lines {len(long_answer) / 1024:8.1f} KiB  legacy {legacy_time * 1000:9.2f} ms"
+              f"  shared {shared_time * 1000:8.2f} ms  ({legacy_time / shared_time:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time clean_script_code.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", type=int, default=200)
+    args = parser.parse_args()
+    check_corpus()
+    fuzz(args.cases, args.seed)
+    scaling()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_hybrid_retrieval.py
+#
+# Compares recall and latency of pure vector search with hybrid BM25 + vector
+# search on queries for the scientific names listed in a Red List PDF. A query
+# counts as a hit if a returned chunk contains the queried name.
+#
+# Run from the v1 directory:
+#     python -m benchmarks.bench_hybrid_retrieval [path/to/file.pdf] [top_k]
+
+import re
+import sys
+import time
+
+from src.pdf_processing.extract_text import extract_page_texts
+from src.retrieval.bm25_index import BM25Index
+from src.retrieval.hybrid_search import retrieve_hybrid
+from src.retrieval.numpy_index import NumpyVectorIndex
+from src.retrieval.retrieve_chunks import add_chunks_to_chroma, get_embedding_function, retrieve_similar_chunks
+from src.text_processing.chunk_text import chunk_pages
+from src.text_processing.clean_text import DEFAULT_PIPELINE
+
+# Binomial names following a category code, e.g. "EN\nSpizaetus isidori"
+_NAME_RE = re.compile(r"\b(?:EX|EW|CR|EN|VU|NT|LC|DD|NA|AM|IC)\s+([A-Z][a-z]+ [a-z]{3,})\b")
+
+
+def evaluate(name, retrieve, queries, top_k):
+    hits = 0
+    started = time.perf_counter()
+    for query in queries:
+        results = retrieve(query, top_k)
+        hits += any(query in result["chunk"] for result in results)
+    elapsed = time.perf_counter() - started
+    print(f"{name:8s} recall@{top_k}: {hits / len(queries):6.1%}   {elapsed / len(queries) * 1000:7.2f} ms/query")
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/uploads/sample.pdf"
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    pages = DEFAULT_PIPELINE.clean_pages(extract_page_texts(path))
+    chunks = chunk_pages(pages, chunk_size=200, chunk_overlap=40)
+    queries = sorted({match for page in pages for match in _NAME_RE.findall(page)})
+    print(f"{len(chunks)} chunks, {len(queries)} scientific-name queries")
+
+    collection = NumpyVectorIndex(get_embedding_function())
+    add_chunks_to_chroma(chunks, collection, source=path)
+    bm25_index = BM25Index.build(chunks, source=path)
+
+    # Warm up the embedding model before timing
+    retrieve_similar_chunks(queries[0], collection, top_k)
+
+    evaluate("vector", lambda q, k: retrieve_similar_chunks(q, collection, k, use_cache=False), queries, top_k)
+    evaluate("hybrid", lambda q, k: retrieve_hybrid(q, collection, bm25_index, k, use_cache=False), queries, top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_record_parser.py
+#
+# Compares the per-line species record loop of test.py (four substring checks per
+# line, keeping the last record of each page) with the single-pass compiled
+# parser in record_parser.py.
+#
+# Run from the v1 directory:
+#     python -m benchmarks.bench_record_parser [path/to/file.pdf]
+
+import random
+import sys
+import timeit
+
+from src.pdf_processing.record_parser import parse_page_records
+
+
+def legacy_parse_page(text):
+    # Loop body of test.extract_scientific_names_and_threats
+    scientific_name = None
+    threat_category = None
+    english_name = None
+    local_name = None
+    for line in text.split("\n"):
+        if "Scientific Name:" in line:
+            parts = line.replace("Scientific Name:", "").strip().split(' ')
+            scientific_name = ' '.join(parts[:2])
+        elif "<" in line and ">" in line:
+            threat_category = line.strip("<>").strip()
+        elif "English Name:" in line:
+            parts = line.replace("English Name:", "").strip().split(' ')
+            english_name = ' '.join(parts[:2])
+        elif "Local Name:" in line:
+            parts = line.replace("Local Name:", "").strip().split(' ')
+            local_name = ' '.join(parts[:2])
+    if scientific_name is not None and threat_category is not None:
+        return [[scientific_name, threat_category, english_name, local_name]]
+    return []
+
+
+def synthetic_pages(count=300, species_per_page=3, seed=0):
+    # Red Book style pages; the sample PDF has no "Scientific Name:" records
+    random.seed(seed)
+    filler = ["Distribution", "forest", "habitat", "loss", "population", "declining", "recorded", "the", "of"]
+    pages = []
+    for i in range(count):
+        lines = [f"Red Data Book of Bangladesh {i + 1}"]
+        for j in range(species_per_page):
+            lines += [
+                f"Scientific Name: Genus{i} species{j} (Linnaeus, 1758)",
+                f"<{random.choice(['CR', 'EN', 'VU', 'NT'])}>",
+                f"English Name: Common Name{j} bird",
+                f"Local Name: Pakhi{j} nam",
+            ]
+            lines += [" ".join(random.choice(filler) for _ in range(12)) for _ in range(15)]
+        pages.append("\n".join(lines))
+    return pages
+
+
+def load_pages(path):
+    import fitz  # PyMuPDF
+    with fitz.open(path) as pdf_document:
+        return [page.get_text("text") for page in pdf_document]
+
+
+def bench(name, pages, runs=20):
+    legacy = sum(len(legacy_parse_page(page)) for page in pages)
+    compiled = sum(len(parse_page_records(page)) for page in pages)
+    legacy_time = min(timeit.repeat(lambda: [legacy_parse_page(page) for page in pages], number=1, repeat=runs))
+    compiled_time = min(timeit.repeat(lambda: [parse_page_records(page) for page in pages], number=1, repeat=runs))
+    print(f"{name}: {len(pages)} pages")
+    print(f"  per-line loop   {legacy_time * 1000:8.2f} ms  {legacy:6d} records")
+    print(f"  single pass     {compiled_time * 1000:8.2f} ms  {compiled:6d} records  ({legacy_time / compiled_time:.1f}x)")
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/uploads/sample.pdf"
+    bench(path, load_pages(path))
+    bench("synthetic Red Book pages", synthetic_pages())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/capture_code_cleaner_corpus.py
+#
+# Captures raw answers of the apps' models for data/code_cleaner_corpus: sends the
+# script prompt of app2.py, built from one page of a PDF, to each model and saves
+# every answer untouched as captured_<model>_<n>.txt, for bench_code_cleaner.
+# Needs a running Ollama server with the models pulled.
+#
+# Run from the v1 directory:
+#     python -m benchmarks.capture_code_cleaner_corpus [--pdf data/uploads/sample.pdf] [--page 1]
+
+import argparse
+import os
+import re
+
+from src.answer_generation.ollama_client import DEFAULT_BASE_URL, get_ollama_client
+from src.pdf_processing.extract_text import extract_page_text
+from src.pdf_processing.script_shards import SCRIPT_ARGS_INSTRUCTIONS
+
+from benchmarks.bench_code_cleaner import CORPUS_DIR
+
+# Models offered by app.py
+MODELS = ["llama3.2:latest", "llama3.2:3b-instruct-q2_K", "qwen2.5:latest"]
+
+# Prompt of app2.py
+PROMPT = """
+You are tasked with writing a simple python script to extract specified data from a PDF.
+Sample page to understand the text structure: {context}
+The goal is to extract this data: {instruction}
+{args_instructions}
+Write the output in the format of this file name: {output_name}
+Important:
+- provide well formatted codeblock, no instructions, no explainers, no comments.
+- format the code as a single markdown formatted codeblock.
+    """
+
+
+def capture(base_url, models, prompt, samples, temperature):
+    client = get_ollama_client(base_url)
+    for model in models:
+        slug = re.sub(r"[^\w.-]+", "-", model)
+        for n in range(1, samples + 1):
+            # Sampled (not cached) answers, so each sample can take another shape
+            generation = client.generate(model, prompt, options={"temperature": temperature}, use_cache=False)
+            path = os.path.join(CORPUS_DIR, f"captured_{slug}_{n}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generation.text)
+            print(f"{path}: {len(generation.text)} characters")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture raw model answers for the code cleaner corpus.")
+    parser.add_argument("--pdf", default=os.path.join("data", "uploads", "sample.pdf"))
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--instruction", default="scientific names and threat categories of all species")
+    parser.add_argument("--output-name", default="scraped_data.csv")
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--samples", type=int, default=3, help="Answers per model")
+    parser.add_argument("--temperature", type=float, default=0.8)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    args = parser.parse_args()
+    prompt = PROMPT.format(
+        context=extract_page_text(args.pdf, args.page, use_cache=False),
+        instruction=args.instruction,
+        args_instructions=SCRIPT_ARGS_INSTRUCTIONS,
+        output_name=args.output_name,
+    )
+    capture(args.base_url, args.models, prompt, args.samples, args.temperature)
+
+
+if __name__ == "__main__":
+    main()
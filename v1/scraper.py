@@ -1,7 +1,8 @@
 import fitz 
 import csv 
-uploaded_file = 
-output_path = 
+import sys
+uploaded_file = sys.argv[1]
+output_path = sys.argv[2]
 
 def extract_scientific_names_and_threats(uploaded_file, output_path):
     document = fitz.open(uploaded_file)
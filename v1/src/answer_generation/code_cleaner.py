@@ -0,0 +1,209 @@
+# src/answer_generation/code_cleaner.py
+
+import ast
+import io
+import json
+import re
+import tokenize
+
+# First fenced block of a markdown answer; the fence may itself be escaped ("```python\n")
+_FENCE_RE = re.compile(r"```[ \t]*(?:python3?|py)?[ \t]*(?:\r?\n|\\n)(.*?)(?:```|\Z)", re.DOTALL | re.IGNORECASE)
+
+# Escapes of a JSON string; others (e.g. regex escapes such as "\d") are kept as is
+_JSON_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|["\\/bfnrt])')
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# Everything that can change the state of the repair pass. Escaped backslashes are
+# matched first, so a backslash never pairs with the one after it twice.
+_REPAIR_TOKEN_RE = re.compile(r"\\(?:\\|u[0-9a-fA-F]{4}|[\"'ntr])|\"\"\"|'''|[\"'#\n]")
+_CODE_ESCAPES = {"\\n": "\n", "\\t": "\t", "\\r": "", "\\\\": "\\"}
+
+# A "#" followed by "\n" on the same line: maybe a comment that swallowed escaped code
+_COMMENT_ESCAPED_LINE_RE = re.compile(r"#[^\n]*\\n")
+
+
+def strip_code_fences(text):
+    """
+    Returns the code of the first fenced block of an LLM answer, or the whole
+    answer (stripped) if it has no fences.
+    """
+    match = _FENCE_RE.search(text)
+    return (match.group(1) if match else text).strip()
+
+
+def json_payload(text):
+    """
+    Returns the script of an answer given as JSON (e.g. with format="json"): the
+    string itself, or the longest string value of an object. Other answers are
+    returned as they are.
+    """
+    if not text.startswith(("{", '"')):
+        return text
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return text
+    if isinstance(value, dict):
+        value = max((item for item in value.values() if isinstance(item, str)), key=len, default=None)
+    return value if isinstance(value, str) else text
+
+
+def unescape_json_string(text):
+    """
+    Undoes the escaping of a JSON string body in one pass, for answers whose code
+    arrives as a single escaped line. Escapes JSON does not know are kept.
+    """
+    def replace(match):
+        escape = match.group(1)
+        return chr(int(escape[1:], 16)) if escape[0] == "u" else _JSON_ESCAPES[escape]
+
+    return _JSON_ESCAPE_RE.sub(replace, text)
+
+
+def repair_escapes(code):
+    """
+    Unescapes code that is only partly escaped, e.g. real line breaks mixed with
+    "\\n" between statements and "\\"" around strings, in one pass.
+
+    Outside string literals, "\\n", "\\t" and "\\uXXXX" become the characters they
+    stand for, and an escaped quote opens a string. Inside literals, escapes are
+    kept, since Python reads them the same way; an escaped quote only closes a
+    string that an escaped quote opened.
+
+    Parameters:
+    code (str): Code to repair.
+
+    Returns:
+    str: The repaired code.
+    """
+    out = []
+    pos = 0
+    state = "code"  # "code", "comment" or "string"
+    delimiter = None  # Quote that closes the current string
+    escaped_open = False  # Whether the current string was opened by an escaped quote
+
+    for match in _REPAIR_TOKEN_RE.finditer(code):
+        start = match.start()
+        if start < pos:  # Inside an escaped triple quote consumed below
+            continue
+        token = match.group()
+        out.append(code[pos:start])
+        pos = match.end()
+        escaped_quote = token in ('\\"', "\\'")
+        if escaped_quote and code.startswith(token * 3, start):
+            token = token * 3
+            pos = start + 6
+        quote = token.replace("\\", "")
+
+        if state == "code":
+            if escaped_quote or token in ('"', "'", '"""', "'''"):
+                out.append(quote)
+                state, delimiter, escaped_open = "string", quote, escaped_quote
+            elif token.startswith("\\u"):
+                out.append(chr(int(token[2:], 16)))
+            else:
+                out.append(_CODE_ESCAPES.get(token, token))
+                if token == "#":
+                    state = "comment"
+        elif state == "comment":
+            if token in ("\n", "\\n"):
+                out.append("\n")
+                state = "code"
+            elif token.startswith("\\u"):
+                out.append(chr(int(token[2:], 16)))
+            else:
+                out.append(quote if escaped_quote else token)
+        else:
+            if token == "\n" and len(delimiter) == 1:
+                # Unterminated string: go on with the next line as code, as tokenize does
+                out.append(token)
+                state = "code"
+            elif quote == delimiter and (escaped_open or not escaped_quote):
+                out.append(quote)
+                state = "code"
+            elif not escaped_quote and len(delimiter) == 1 and token == delimiter * 3:
+                # "abc""" closes the string and opens an empty one
+                out.append(token)
+                state = "code"
+            else:
+                out.append(token)
+
+    out.append(code[pos:])
+    return "".join(out)
+
+
+def syntax_error(code):
+    """
+    Returns the SyntaxError raised when parsing the code, or None if it is valid Python.
+    """
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError) as e:  # ValueError: null bytes
+        return e if isinstance(e, SyntaxError) else SyntaxError(str(e))
+    return None
+
+
+def _hides_escaped_lines(code):
+    # An escaped answer that starts with an import and a comment, e.g.
+    # "import csv  # for output\nwith open(...", parses as valid code: the rest of
+    # the answer is one long comment. A comment holding "\n" gives that away.
+    if not _COMMENT_ESCAPED_LINE_RE.search(code):
+        return False
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.COMMENT and "\\n" in token.string:
+                return True
+    except (tokenize.TokenError, SyntaxError):
+        return True
+    return False
+
+
+def _unescape_twice(code):
+    # Escaped code that was escaped again, e.g. a JSON answer that quotes it
+    return unescape_json_string(unescape_json_string(code))
+
+
+def _error_offset(code, error):
+    # Characters of the code that parsed before the error
+    if not error.lineno:
+        return 0
+    lines = code.split("\n", error.lineno - 1)[:error.lineno - 1]
+    return sum(len(line) + 1 for line in lines) + (error.offset or 0)
+
+
+def clean_script_code(script_code):
+    """
+    Extracts runnable code from an LLM answer.
+
+    The code of the first fenced block (or the whole answer, or the script held by
+    a JSON answer) is returned as is when it is valid Python. Otherwise it is
+    unescaped as a JSON string and, failing that, repaired with `repair_escapes`
+    or unescaped twice; the first version that is valid is
+    returned. Code counts as valid when it parses and no comment swallows an
+    escaped line break. If no version is valid, the one that parses furthest is
+    returned. Each step is a single pass over the text.
+
+    Parameters:
+    script_code (str): Answer of the LLM, or the code extracted from it.
+
+    Returns:
+    str: The cleaned script code.
+    """
+    if not script_code:
+        return ""
+    code = json_payload(strip_code_fences(script_code))
+    if "\\" not in code:
+        return code
+
+    attempts = []
+    for clean in (str, unescape_json_string, repair_escapes, _unescape_twice):
+        cleaned = clean(code).strip()
+        error = syntax_error(cleaned)
+        if error is None and not _hides_escaped_lines(cleaned):
+            return cleaned
+        attempts.append((cleaned, error))
+
+    for cleaned, error in attempts:
+        if error is None:
+            return cleaned
+    return max(reversed(attempts), key=lambda attempt: _error_offset(*attempt))[0]
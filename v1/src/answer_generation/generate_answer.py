@@ -1,36 +1,103 @@
 # src/answer_generation/generate_answer.py
 
+import asyncio
 import requests
 import logging
 import json
 
+import httpx
+
+from src.answer_generation.model_manager import split_latency
+from src.answer_generation.ollama_client import DEFAULT_BASE_URL, OllamaError, get_async_ollama_client, get_ollama_client
+
 
 # Set up basic logging configuration (optional)
 logging.basicConfig(level=logging.INFO)
 
-def initialize_ollama_connection(base_url="http://localhost:11434"):
+def _log_generation(generation):
+    if generation.cached:
+        # The stored timings are those of the original run, not of this request
+        logging.info("%s: cached response", generation.model)
+        return
+    latency = split_latency(generation)
+    if latency["tokens_per_second"]:
+        logging.info(
+            "%s: load %.2fs, eval %.2fs (%d tokens at %.1f tokens/s)",
+            generation.model,
+            latency["load_seconds"] or 0.0,
+            latency["eval_seconds"],
+            generation.eval_count,
+            latency["tokens_per_second"],
+        )
+
+def initialize_ollama_connection(base_url=DEFAULT_BASE_URL):
     return base_url
 
-def generate_answer(base_url, question, llm_model):
-    payload = {
-        "model": llm_model,
-        "prompt": question,
-        "stream": False,
-        "temperature": 0,
-    }
+def generate_answer(base_url, question, llm_model, on_token=None, use_cache=True):
+    """
+    Generates an answer with an Ollama model.
 
+    Parameters:
+    base_url (str): URL of the Ollama server.
+    question (str): The prompt.
+    llm_model (str): Name of the Ollama model.
+    on_token (callable): Called with each piece of the answer as it is generated.
+    use_cache (bool): Whether to reuse a cached answer to the same prompt.
+
+    Returns:
+    str: The answer text, or an error message starting with "Error".
+    """
     try:
-        response = requests.post(f"{base_url}/api/generate", json=payload)
-        response.raise_for_status()
-        print(repr(response.text))
-        # Assuming the API returns plain text as the answer.
-        return response.text
+        generation = get_ollama_client(base_url).generate(llm_model, question, on_token=on_token, use_cache=use_cache)
+        _log_generation(generation)
+        return generation.text
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, OllamaError) as e:
         print(f"Error connecting to Ollama API: {e}")
         return "Error connecting to Ollama API."
 
-    except json.JSONDecodeError:
-        print("Failed to decode JSON:", response.text)
+    except json.JSONDecodeError as e:
+        print("Failed to decode JSON:", e)
         return "Error: Unexpected response format from Ollama API."
-    
\ No newline at end of file
+
+async def agenerate_answer(base_url, question, llm_model, on_token=None, use_cache=True):
+    """
+    asyncio version of `generate_answer`, with the same return values.
+    """
+    try:
+        generation = await get_async_ollama_client(base_url).generate(llm_model, question, on_token=on_token, use_cache=use_cache)
+        _log_generation(generation)
+        return generation.text
+
+    except (httpx.HTTPError, OllamaError) as e:
+        print(f"Error connecting to Ollama API: {e}")
+        return "Error connecting to Ollama API."
+
+    except json.JSONDecodeError as e:
+        print("Failed to decode JSON:", e)
+        return "Error: Unexpected response format from Ollama API."
+
+async def generate_many(prompts, llm_model, base_url=DEFAULT_BASE_URL, concurrency=4, use_cache=True):
+    """
+    Generates answers to several prompts concurrently.
+
+    At most `concurrency` requests are in flight at once; set it to the server's
+    OLLAMA_NUM_PARALLEL. Cancelling the returned coroutine cancels all requests.
+
+    Parameters:
+    prompts (list of str): The prompts.
+    llm_model (str): Name of the Ollama model.
+    base_url (str): URL of the Ollama server.
+    concurrency (int): Maximum number of concurrent requests.
+    use_cache (bool): Whether to reuse cached answers to the same prompts.
+
+    Returns:
+    list of str: The answer (or error message) for each prompt, in the order of `prompts`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(prompt):
+        async with semaphore:
+            return await agenerate_answer(base_url, prompt, llm_model, use_cache=use_cache)
+
+    return await asyncio.gather(*(generate(prompt) for prompt in prompts))
@@ -0,0 +1,129 @@
+# src/answer_generation/model_manager.py
+
+import time
+from functools import lru_cache
+
+import requests
+
+from src.embeddings.embed_text import get_embedding_service
+from src.answer_generation.ollama_client import DEFAULT_BASE_URL, get_async_ollama_client, get_ollama_client
+
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+def split_latency(generation):
+    """
+    Splits the latency of a generation into model loading and token generation.
+
+    Parameters:
+    generation (Generation): A response from `OllamaClient.generate`.
+
+    Returns:
+    dict: "load_seconds", "eval_seconds", "total_seconds" and "tokens_per_second"
+    (None where Ollama did not report the field).
+    """
+    def seconds(nanoseconds):
+        return nanoseconds / 1e9 if nanoseconds is not None else None
+
+    eval_seconds = seconds(generation.eval_duration)
+    return {
+        "load_seconds": seconds(generation.load_duration),
+        "eval_seconds": eval_seconds,
+        "total_seconds": seconds(generation.total_duration),
+        "tokens_per_second": generation.eval_count / eval_seconds if generation.eval_count and eval_seconds else None,
+    }
+
+
+class ModelManager:
+    """
+    Keeps Ollama models loaded between requests.
+
+    Pins `keep_alive` on the shared generation clients, so models stay in memory
+    for that long after each request, and preloads models before their first
+    prompt so the load time is not paid by the user's request.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, keep_alive=DEFAULT_KEEP_ALIVE, embedding_model=None, timeout=(5.0, 300.0)):
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.embedding_model = embedding_model
+        self.timeout = timeout
+        self.client = get_ollama_client(base_url)
+        self.client.keep_alive = keep_alive
+        get_async_ollama_client(base_url).keep_alive = keep_alive
+        if embedding_model:
+            # Embedding requests from embed_text_chunks keep the model loaded as well
+            get_embedding_service(embedding_model).embeddings.keep_alive = keep_alive
+        self.loaded = {}  # Model name -> last warmup report
+
+    def _post(self, endpoint, payload):
+        started = time.perf_counter()
+        response = self.client.session.post(f"{self.base_url}{endpoint}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json(), time.perf_counter() - started
+
+    def warmup(self, model):
+        """
+        Loads a model into memory with an empty generate request. For a model that
+        is already loaded this returns at once and restarts its keep-alive timer.
+
+        Also warms `embedding_model` on first use, if one was given.
+
+        Parameters:
+        model (str): Name of the Ollama model.
+
+        Returns:
+        dict: "model", "load_seconds" (as reported by Ollama) and "wall_seconds", or
+        None if the server could not be reached.
+        """
+        if self.embedding_model and self.embedding_model not in self.loaded:
+            self.warmup_embeddings()
+        return self._load(model, "/api/generate", {"model": model, "keep_alive": self.keep_alive})
+
+    def warmup_embeddings(self, model=None):
+        """
+        Loads an embedding model (by default `embedding_model`) with an empty embed request.
+        """
+        model = model or self.embedding_model
+        return self._load(model, "/api/embed", {"model": model, "input": [], "keep_alive": self.keep_alive})
+
+    def _load(self, model, endpoint, payload):
+        try:
+            body, wall_seconds = self._post(endpoint, payload)
+        except requests.exceptions.RequestException as e:
+            print(f"Error warming up {model}: {e}")
+            return None
+        load_duration = body.get("load_duration")
+        report = {
+            "model": model,
+            "load_seconds": load_duration / 1e9 if load_duration is not None else wall_seconds,
+            "wall_seconds": wall_seconds,
+        }
+        self.loaded[model] = report
+        return report
+
+    def unload(self, model):
+        """
+        Unloads a model from memory right away.
+        """
+        try:
+            self._post("/api/generate", {"model": model, "keep_alive": 0})
+        except requests.exceptions.RequestException as e:
+            print(f"Error unloading {model}: {e}")
+        self.loaded.pop(model, None)
+
+    def running_models(self):
+        """
+        Returns the names of the models currently loaded by the server.
+        """
+        response = self.client.session.get(f"{self.base_url}/api/ps", timeout=self.timeout)
+        response.raise_for_status()
+        return [entry["name"] for entry in response.json().get("models", [])]
+
+
+@lru_cache(maxsize=None)
+def get_model_manager(base_url=DEFAULT_BASE_URL, keep_alive=DEFAULT_KEEP_ALIVE, embedding_model=None):
+    """
+    Returns the process-wide model manager for an Ollama server.
+    """
+    return ModelManager(base_url, keep_alive, embedding_model)
@@ -0,0 +1,241 @@
+# src/answer_generation/ollama_client.py
+
+import asyncio
+import json
+from collections import namedtuple
+from functools import lru_cache
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.async_http import LoopClients
+from src.answer_generation.response_cache import get_response_cache, is_deterministic, response_key
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_OPTIONS = {"temperature": 0}
+
+# Parsed response text with Ollama's timing fields (durations are in nanoseconds);
+# "cached" is set on responses served from the response cache, whose timing
+# fields are those of the original run
+Generation = namedtuple(
+    "Generation",
+    ["text", "model", "eval_count", "eval_duration", "load_duration", "total_duration", "cached"],
+    defaults=[False],
+)
+
+
+class OllamaError(Exception):
+    """
+    Raised when the Ollama server reports an error for a request.
+    """
+
+
+def _payload(model, prompt, stream, options=None, keep_alive=None, **extra):
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        # Sampling parameters are only read from "options"
+        "options": {**DEFAULT_OPTIONS, **(options or {})},
+        **extra,
+    }
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    return payload
+
+
+def _parse_message(line):
+    message = json.loads(line)
+    if "error" in message:
+        raise OllamaError(message["error"])
+    return message
+
+
+def _generation(pieces, final, model):
+    return Generation(
+        text="".join(pieces),
+        model=final.get("model", model),
+        eval_count=final.get("eval_count"),
+        eval_duration=final.get("eval_duration"),
+        load_duration=final.get("load_duration"),
+        total_duration=final.get("total_duration"),
+    )
+
+
+def _cached_generation(cache, use_cache, model, prompt, options, extra):
+    """
+    Looks up a request in the response cache.
+
+    Returns:
+    tuple of (str, Generation): The cache key (None if the request must not be
+    cached) and the cached generation (None on a miss).
+    """
+    if cache is None or not use_cache or not is_deterministic({**DEFAULT_OPTIONS, **(options or {})}):
+        return None, None
+    key = response_key(model, prompt, {**DEFAULT_OPTIONS, **(options or {})}, **extra)
+    cached = cache.get(key)
+    return key, Generation(**{**cached, "cached": True}) if cached is not None else None
+
+
+class OllamaClient:
+    """
+    Client for Ollama's /api/generate endpoint.
+
+    Requests go through one pooled keep-alive `requests.Session`, with separate
+    connect and read timeouts. Responses are streamed as NDJSON, so tokens can
+    be shown while the model is still generating. With a `cache`, responses to
+    deterministic requests are stored and reused (see `response_cache`).
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, connect_timeout=5.0, read_timeout=300.0, pool_size=4, keep_alive=None, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.keep_alive = keep_alive
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def stream(self, model, prompt, options=None, **extra):
+        """
+        Streams a completion.
+
+        Parameters:
+        model (str): Name of the Ollama model.
+        prompt (str): The prompt.
+        options (dict): Model options such as "temperature" or "num_ctx".
+        **extra: Further request fields, e.g. "system" or "format".
+
+        Yields:
+        dict: Each NDJSON message. Messages carry the next piece of text under
+        "response"; the last one has "done" set and carries the timing fields.
+        """
+        payload = _payload(model, prompt, True, options, self.keep_alive, **extra)
+        with self.session.post(f"{self.base_url}/api/generate", json=payload, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield _parse_message(line)
+
+    def generate(self, model, prompt, options=None, on_token=None, use_cache=True, **extra):
+        """
+        Generates a completion, streaming it to `on_token` if given.
+
+        Parameters:
+        model (str): Name of the Ollama model.
+        prompt (str): The prompt.
+        options (dict): Model options such as "temperature" or "num_ctx".
+        on_token (callable): Called with each piece of text as it arrives (once,
+            with the whole text, for a cached response).
+        use_cache (bool): Whether to use the response cache; set to False to force
+            a new completion (it still replaces the cached one).
+        **extra: Further request fields, e.g. "system" or "format".
+
+        Returns:
+        Generation: The response text and timing fields.
+        """
+        key, cached = _cached_generation(self.cache, use_cache, model, prompt, options, extra)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached.text)
+            return cached
+
+        pieces = []
+        final = {}
+        for message in self.stream(model, prompt, options, **extra):
+            piece = message.get("response", "")
+            if piece:
+                pieces.append(piece)
+                if on_token is not None:
+                    on_token(piece)
+            if message.get("done"):
+                final = message
+        generation = _generation(pieces, final, model)
+        if key is not None and final:
+            self.cache.put(key, model, generation._asdict())
+        return generation
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncOllamaClient:
+    """
+    asyncio counterpart of `OllamaClient`, built on `httpx.AsyncClient`.
+
+    Concurrency is left to the caller (see `generate_answer.generate_many`); up to
+    `pool_size` idle connections are kept alive between requests.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, connect_timeout=5.0, read_timeout=300.0, pool_size=8, keep_alive=None, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.cache = cache
+        self._clients = LoopClients(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_size),
+        )
+
+    async def stream(self, model, prompt, options=None, **extra):
+        """
+        Streams a completion, see `OllamaClient.stream`.
+        """
+        payload = _payload(model, prompt, True, options, self.keep_alive, **extra)
+        async with self._clients.get().stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield _parse_message(line)
+
+    async def generate(self, model, prompt, options=None, on_token=None, use_cache=True, **extra):
+        """
+        Generates a completion, see `OllamaClient.generate`.
+        """
+        # The cache is blocking sqlite, so it is read and written off the event loop
+        key, cached = await asyncio.to_thread(_cached_generation, self.cache, use_cache, model, prompt, options, extra)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached.text)
+            return cached
+
+        pieces = []
+        final = {}
+        async for message in self.stream(model, prompt, options, **extra):
+            piece = message.get("response", "")
+            if piece:
+                pieces.append(piece)
+                if on_token is not None:
+                    on_token(piece)
+            if message.get("done"):
+                final = message
+        generation = _generation(pieces, final, model)
+        if key is not None and final:
+            await asyncio.to_thread(self.cache.put, key, model, generation._asdict())
+        return generation
+
+    async def aclose(self):
+        """
+        Closes the HTTP client of the running event loop.
+        """
+        await self._clients.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_ollama_client(base_url=DEFAULT_BASE_URL):
+    """
+    Returns the process-wide client for an Ollama server, so its connections are reused.
+    """
+    return OllamaClient(base_url, cache=get_response_cache())
+
+
+@lru_cache(maxsize=None)
+def get_async_ollama_client(base_url=DEFAULT_BASE_URL):
+    """
+    Returns the process-wide asyncio client for an Ollama server.
+    """
+    return AsyncOllamaClient(base_url, cache=get_response_cache())
@@ -0,0 +1,124 @@
+# src/answer_generation/response_cache.py
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from functools import lru_cache
+
+from src.sqlite_store import SQLiteLRUStore
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "llm_responses.sqlite3")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # Compressed response text kept on disk
+DEFAULT_TTL = 30 * 24 * 3600  # Seconds; None keeps responses until evicted
+
+
+def is_deterministic(options):
+    """
+    Checks whether generation options make a model's output reproducible
+    (greedy decoding, or a fixed sampling seed).
+    """
+    return options.get("temperature") == 0 or options.get("seed") is not None
+
+
+def response_key(model, prompt, options=None, **extra):
+    """
+    Returns the cache key of a generation request.
+
+    Parameters:
+    model (str): Name of the Ollama model.
+    prompt (str): The prompt, hashed into the key.
+    options (dict): Model options.
+    **extra: Further request fields that change the output, e.g. "system" or "format".
+
+    Returns:
+    str: Hex digest identifying the request.
+    """
+    request = {
+        "model": model,
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "options": options or {},
+        "extra": extra,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResponseCache(SQLiteLRUStore):
+    """
+    On-disk store of LLM responses, keyed by `response_key`.
+
+    Responses are zlib-compressed in SQLite. Entries older than `ttl` seconds are
+    ignored and purged, and when the total stored size exceeds `max_bytes`, the
+    least recently used entries are evicted.
+    """
+
+    ENTRIES_TABLE = "responses"
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        super().__init__(path, max_bytes, [
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response BLOB NOT NULL, bytes INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)",
+        ])
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _expired_before(self):
+        return time.time() - self.ttl if self.ttl is not None else float("-inf")
+
+    def get(self, key):
+        """
+        Returns the cached response fields (a dict) for a key, or None.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created >= ?", (key, self._expired_before())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, key, model, response):
+        """
+        Stores the fields of a response (a JSON-serializable dict).
+        """
+        blob = zlib.compress(json.dumps(response).encode("utf-8"))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, bytes, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, blob, len(blob), now, now),
+            )
+            self._evict(keep=key)
+
+    def _purge(self):
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (self._expired_before(),))
+
+    def stats(self):
+        """
+        Returns the number of cached responses, their total compressed size and the hit rate.
+        """
+        entries, size = self._totals()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """
+    Returns the process-wide LLM response cache, creating it on first use.
+    """
+    return ResponseCache()
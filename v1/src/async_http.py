@@ -0,0 +1,46 @@
+# src/async_http.py
+
+import asyncio
+import weakref
+
+import httpx
+
+
+class LoopClients:
+    """
+    Keeps one pooled `httpx.AsyncClient` per event loop.
+
+    httpx clients are bound to the event loop they were created on, and every
+    `asyncio.run` (e.g. one per Streamlit rerun) starts a new loop. Clients of
+    loops that have been closed are dropped on the next lookup, and entries go
+    away with their loop, so finished loops do not keep clients and their
+    connections alive.
+    """
+
+    def __init__(self, **client_options):
+        self.client_options = client_options
+        self._clients = weakref.WeakKeyDictionary()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def get(self):
+        """
+        Returns the client of the running event loop, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+            client = httpx.AsyncClient(**self.client_options)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """
+        Closes the client of the running event loop.
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -1,24 +1,52 @@
 # src/embeddings/embed_text.py
 
-from langchain.embeddings import OllamaEmbeddings
+from functools import lru_cache
+from itertools import islice
+
+from src.embeddings.embedding_cache import CachedEmbeddings
+from src.embeddings.embedding_service import DEFAULT_EMBEDDING_MODEL, EmbeddingService
+
+
+@lru_cache(maxsize=None)
+def get_embedding_service(model=DEFAULT_EMBEDDING_MODEL):
+    """
+    Returns the process-wide embedding service for a model, so its HTTP connections are reused.
+    Chunks embedded before (by hash of their text) are served from the on-disk cache.
+    """
+    return CachedEmbeddings(EmbeddingService(model=model), model)
+
 
 def embed_text_chunks(chunks):
     """
-    Embeds each text chunk using LangChain's Ollama integration.
-    
+    Embeds each text chunk using Ollama's batched embedding endpoint.
+
     Parameters:
     chunks (list of str): List of text chunks to embed.
-    
+
     Returns:
     list of list of float: A list of embedding vectors for each chunk.
     """
-    # Initialize the Ollama embeddings
-    embedding_model = OllamaEmbeddings(model="nomic-embed-text")  # Specify the model name
+    return get_embedding_service().embed_documents(chunks)
+
+def embed_chunk_stream(chunks, batch_size=256):
+    """
+    Embeds a stream of text chunks batch by batch, as they are produced.
 
-    # Generate embeddings for each chunk
-    embeddings = embedding_model.embed_documents(chunks)
-    
-    return embeddings
+    Parameters:
+    chunks (iterable of str): Text chunks, e.g. from `pdf_ingestion.iter_document_chunks`.
+    batch_size (int): Number of chunks collected before they are sent to the service,
+        which splits them further into concurrent requests.
+
+    Yields:
+    tuple of (str, list of float): Each chunk with its embedding vector.
+    """
+    embedding_service = get_embedding_service()
+    chunks = iter(chunks)
+    while True:
+        batch = list(islice(chunks, batch_size))
+        if not batch:
+            break
+        yield from zip(batch, embedding_service.embed_documents(batch))
 
 if __name__ == "__main__":
     # Example text chunks; replace with actual text chunks to embed
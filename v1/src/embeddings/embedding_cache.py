@@ -0,0 +1,305 @@
+# src/embeddings/embedding_cache.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process should write the cache
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "embeddings")
+
+
+def chunk_hash(text):
+    """
+    Returns the SHA-256 hex digest of a chunk's text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent store of embedding vectors for one model, keyed by chunk-text hash.
+
+    Vectors are appended as float32 rows to a flat file that is read through a
+    memory map, and the row of each chunk hash is kept in an append-only index
+    file (one hash per line, in row order). Writers take a file lock, so several
+    processes (e.g. the app and batch_scraper.py) can share one cache.
+    """
+
+    def __init__(self, model, cache_dir=DEFAULT_CACHE_DIR):
+        self.model = model
+        self.directory = os.path.join(cache_dir, re.sub(r"[^\w.-]", "_", model))
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.txt")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        self.lock_path = os.path.join(self.directory, "lock")
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._index = {}
+        self._rows = 0  # Index lines read so far; duplicate keys take a row each
+        self._index_offset = 0  # Bytes of the index file read so far
+        self.dim = None
+
+        self.dim = self._read_dim()
+        if self.dim:
+            with self._file_lock():
+                self._sync()
+
+    def _read_dim(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path) as f:
+            return json.load(f)["dim"]
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync(self):
+        # Reads index lines appended since the last call (by this or another
+        # process), with the file lock held. If the two files disagree, e.g. after a
+        # crash between the two appends, both are cut back to the rows they share,
+        # so the next rows are appended in step again.
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._index_offset += len(line)
+                    self._index[line.decode("utf-8").strip()] = self._rows
+                    self._rows += 1
+        row_bytes = 4 * self.dim
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        index_bytes = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        if vector_bytes == self._rows * row_bytes and index_bytes == self._index_offset:
+            return
+
+        rows = min(self._rows, vector_bytes // row_bytes)
+        lines = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                lines = f.readlines()[:rows]
+        with open(self.index_path, "wb") as f:
+            f.writelines(lines)
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(rows * row_bytes)
+        self._index = {line.decode("utf-8").strip(): row for row, line in enumerate(lines)}
+        self._rows = rows
+        self._index_offset = sum(len(line) for line in lines)
+        self._matrix = None
+
+    def _refresh(self):
+        # Picks up rows other processes appended since the last sync; only a stat
+        # of the index file when nothing changed
+        if self.dim is None:
+            self.dim = self._read_dim()
+            if self.dim is None:
+                return
+        index_bytes = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        if index_bytes != self._index_offset:
+            with self._file_lock():
+                self._sync()
+
+    def __len__(self):
+        return len(self._index)
+
+    def _vectors(self):
+        if self._matrix is None or len(self._matrix) < self._rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim))
+        return self._matrix
+
+    def get_many(self, keys):
+        """
+        Looks up vectors by chunk hash.
+
+        Parameters:
+        keys (list of str): Chunk hashes.
+
+        Returns:
+        list: float32 vector for each key found, None for each key not cached.
+        """
+        with self._lock:
+            self._refresh()
+            rows = [self._index.get(key) for key in keys]
+            found = sum(row is not None for row in rows)
+            self.hits += found
+            self.misses += len(keys) - found
+            if not found:
+                return [None] * len(keys)
+            matrix = self._vectors()
+            return [None if row is None else np.array(matrix[row]) for row in rows]
+
+    def put_many(self, keys, vectors):
+        """
+        Stores vectors for chunk hashes that are not cached yet.
+
+        Parameters:
+        keys (list of str): Chunk hashes.
+        vectors (list of list of float): Embedding vector for each key.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            if self.dim is None:
+                self.dim = self._read_dim()  # Another process may have created the cache
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                # Written whole and renamed into place, so readers never see a partial file
+                temp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w") as f:
+                    json.dump({"model": self.model, "dim": self.dim}, f)
+                os.replace(temp_path, self.meta_path)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors for {self.model}, got {vectors.shape[1]}.")
+
+            self._sync()
+            new_rows = [i for i, key in enumerate(keys) if key not in self._index]
+            new_rows = list({keys[i]: i for i in new_rows}.values())  # Drop duplicate keys
+            if not new_rows:
+                return
+            # Vectors are written before the index, so an index line always has its row
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors[new_rows].tobytes())
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(keys[i] + "\n" for i in new_rows))
+            self._sync()
+
+    def stats(self):
+        """
+        Returns the number of cached vectors and the lookup hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory mapping that keeps the `maxsize` most recently used entries.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings:
+    """
+    Wraps an embedding model so only chunks missing from the cache reach the model.
+
+    Implements LangChain's embed_documents/embed_query interface, so it can be
+    passed wherever the wrapped embeddings were used (e.g. a Chroma collection).
+    Query embeddings are kept in a small in-memory LRU cache instead, since the
+    same prompts are retrieved again on every app rerun.
+    """
+
+    def __init__(self, embeddings, model_name, cache=None, query_cache_size=256):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache(model_name)
+        self.query_cache = LRUCache(query_cache_size)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [chunk_hash(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(list(missing), new_vectors)
+            by_key = dict(zip(missing, new_vectors))
+            vectors = [by_key[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def embed_query(self, text):
+        # Queries bypass the on-disk cache, which would fill up with one-off prompts
+        vector = self.query_cache.get(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.query_cache.put(text, vector)
+        return list(vector)
+
+    def embed_queries(self, texts):
+        """
+        Embeds several queries, sending only those missing from the query cache
+        to the model. Each goes through the model's `embed_query`, which may differ
+        from `embed_documents` (e.g. models that prefix queries).
+        """
+        texts = list(texts)
+        vectors = [self.query_cache.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            by_text = {text: self.embeddings.embed_query(text) for text in missing}
+            for text, vector in by_text.items():
+                self.query_cache.put(text, vector)
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return [list(vector) for vector in vectors]
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,114 @@
+# src/embeddings/embedding_service.py
+
+import asyncio
+import threading
+
+import httpx
+
+from src.async_http import LoopClients
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+
+
+class EmbeddingService:
+    """
+    Embeds text chunks through Ollama's /api/embed endpoint.
+
+    Chunks are sent in batches of `batch_size`, with up to `concurrency` batches in
+    flight over one pooled keep-alive HTTP client. Failed batches are retried on
+    their own, so batches that already succeeded are never re-embedded.
+    """
+
+    def __init__(
+        self,
+        base_url=DEFAULT_BASE_URL,
+        model=DEFAULT_EMBEDDING_MODEL,
+        batch_size=64,
+        concurrency=4,
+        max_retries=3,
+        timeout=120.0,
+        keep_alive=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self._clients = LoopClients(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _background_loop(self):
+        """
+        Returns the event loop used by the synchronous API, starting it on first use.
+
+        Running it in a daemon thread keeps its HTTP client and connections alive
+        between calls, and works from threads that already run an event loop.
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="embedding-service", daemon=True).start()
+            return self._loop
+
+    async def _embed_batch(self, batch, semaphore):
+        payload = {"model": self.model, "input": batch}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await self._clients.get().post("/api/embed", json=payload)
+                    response.raise_for_status()
+                embeddings = response.json()["embeddings"]
+                if len(embeddings) != len(batch):
+                    raise ValueError(f"Expected {len(batch)} embeddings, got {len(embeddings)}.")
+                return embeddings
+            except (httpx.HTTPError, KeyError, ValueError) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Embedding batch failed (attempt {attempt + 1}), retrying. Error:", e)
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def aembed(self, chunks):
+        """
+        Embeds text chunks concurrently.
+
+        Parameters:
+        chunks (list of str): List of text chunks to embed.
+
+        Returns:
+        list of list of float: Embedding vectors, in the order of `chunks`.
+        """
+        chunks = list(chunks)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch(batch, semaphore) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+    def embed(self, chunks):
+        """
+        Synchronous wrapper around `aembed`.
+        """
+        return asyncio.run_coroutine_threadsafe(self.aembed(chunks), self._background_loop()).result()
+
+    async def aclose(self):
+        """
+        Closes the HTTP client of the running event loop.
+        """
+        await self._clients.aclose()
+
+    # LangChain Embeddings interface, so the service can back a vector store
+    def embed_documents(self, texts):
+        return self.embed(texts)
+
+    def embed_query(self, text):
+        return self.embed([text])[0]
@@ -1,6 +1,7 @@
 
 import json
 import uuid
+from functools import lru_cache
 from operator import itemgetter
 from typing import (
     Any,
@@ -9,6 +10,7 @@ from typing import (
     List,
     Optional,
     Sequence,
+    Tuple,
     Type,
     TypedDict,
     TypeVar,
@@ -25,6 +27,7 @@ from langchain_core.language_models import LanguageModelInput
 from langchain_core.messages import (
     AIMessage,
     BaseMessage,
+    SystemMessage,
     ToolCall,
 )
 from langchain_core.output_parsers.base import OutputParserLike
@@ -53,6 +56,13 @@ You must always select one of the above tools and respond with only a JSON objec
 }}
 """  # noqa: E501
 
+# Used with `OllamaFunctions.use_json_schema_format`: the response format is
+# enforced by constrained decoding, so the prompt only needs to name the tools.
+COMPACT_SYSTEM_TEMPLATE = """Select exactly one of these tools and respond with a JSON object {{"tool": <tool name>, "tool_input": <tool arguments>}}.
+
+{tools}
+"""  # noqa: E501
+
 DEFAULT_RESPONSE_FUNCTION = {
     "name": "__conversational_response",
     "description": (
@@ -80,12 +90,24 @@ def _is_pydantic_class(obj: Any) -> bool:
     )
 
 
+@lru_cache(maxsize=None)
+def _convert_pydantic_tool(tool: Type[BaseModel]) -> str:
+    # Cached as a JSON string, so callers each get their own dicts to modify
+    schema = tool.model_construct().model_json_schema()
+    definition = {"name": schema["title"], "parameters": schema}
+    if schema.get("description"):
+        definition["description"] = schema["description"]
+    return json.dumps(definition)
+
+
 def convert_to_ollama_tool(tool: Any) -> Dict:
-    """Convert a tool to an Ollama tool."""
+    """Convert a tool to an Ollama tool.
+
+    Pydantic classes are converted once per class; the schema generation is cached.
+    """
     description = None
     if _is_pydantic_class(tool):
-        schema = tool.model_construct().model_json_schema()
-        name = schema["title"]
+        return json.loads(_convert_pydantic_tool(tool))
     elif isinstance(tool, BaseTool):
         schema = tool.tool_call_schema.model_json_schema()
         name = tool.get_name()
@@ -108,6 +130,53 @@ def convert_to_ollama_tool(tool: Any) -> Dict:
     return definition
 
 
+def tools_to_json_schema(functions: List[Dict]) -> Dict:
+    """Build a JSON schema matching a call of any of the given Ollama tools.
+
+    Passed as Ollama's `format`, the schema constrains decoding to valid
+    `{"tool": ..., "tool_input": ...}` objects. The `$defs` of the tools' schemas
+    are merged at the top level, where their `$ref`s point.
+
+    Args:
+        functions: Tools as returned by `convert_to_ollama_tool`.
+
+    Returns:
+        The JSON schema.
+    """
+    definitions: Dict[str, Any] = {}
+    variants = []
+    for fn in functions:
+        parameters = dict(fn["parameters"])
+        definitions.update(parameters.pop("$defs", {}))
+        variants.append(
+            {
+                "type": "object",
+                "properties": {
+                    "tool": {"type": "string", "enum": [fn["name"]]},
+                    "tool_input": parameters,
+                },
+                "required": ["tool", "tool_input"],
+            }
+        )
+    schema: Dict[str, Any] = variants[0] if len(variants) == 1 else {"anyOf": variants}
+    if definitions:
+        schema = {**schema, "$defs": definitions}
+    return schema
+
+
+def _describe_tools(functions: List[Dict]) -> str:
+    return "\n".join(
+        f"- {fn['name']}: {fn['description']}" if fn.get("description") else f"- {fn['name']}"
+        for fn in functions
+    )
+
+
+@lru_cache(maxsize=128)
+def _tool_system_message(template: str, tools: str) -> SystemMessage:
+    # Formatting the template is reused across calls with the same tools
+    return SystemMessagePromptTemplate.from_template(template).format(tools=tools)
+
+
 class _AllReturnType(TypedDict):
     raw: BaseMessage
     parsed: Optional[_DictOrPydantic]
@@ -142,6 +211,10 @@ class OllamaFunctions(ChatOllama):
 
     tool_system_prompt_template: str = DEFAULT_SYSTEM_TEMPLATE
 
+    use_json_schema_format: bool = False
+    """Constrain responses to the tools' JSON schemas with Ollama's native `format`
+    (requires Ollama 0.5 or later), instead of embedding the schemas in the prompt."""
+
     def __init__(self, **kwargs: Any) -> None:
         super().__init__(**kwargs)
 
@@ -283,37 +356,48 @@ class OllamaFunctions(ChatOllama):
         else:
             return llm | parser_chain
 
-    def _generate(
-        self,
-        messages: List[BaseMessage],
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> ChatResult:
-        functions = kwargs.get("functions", [])
-        if "functions" in kwargs:
-            del kwargs["functions"]
-        if "function_call" in kwargs:
-            functions = [
-                fn for fn in functions if fn["name"] == kwargs["function_call"]["name"]
-            ]
+    def _prepare_tool_request(
+        self, kwargs: Dict[str, Any]
+    ) -> Tuple[List[Dict], BaseMessage]:
+        """Pop the tools from the call kwargs and build the system message.
+
+        Shared by `_generate` and `_agenerate`. `kwargs` is updated in place: the
+        `functions` and `function_call` entries are removed, and in
+        `use_json_schema_format` mode the tools' schema is set as `format`.
+
+        Returns:
+            The Ollama tools offered to the model, including
+            `DEFAULT_RESPONSE_FUNCTION`, and the system message describing them.
+        """
+        functions = [convert_to_ollama_tool(fn) for fn in kwargs.pop("functions", [])]
+        function_call = kwargs.pop("function_call", None)
+        if function_call is not None:
+            functions = [fn for fn in functions if fn["name"] == function_call["name"]]
             if not functions:
                 raise ValueError(
                     "If `function_call` is specified, you must also pass a "
                     "matching function in `functions`."
                 )
-            del kwargs["function_call"]
-        functions = [convert_to_ollama_tool(fn) for fn in functions]
         functions.append(DEFAULT_RESPONSE_FUNCTION)
-        system_message_prompt_template = SystemMessagePromptTemplate.from_template(
-            self.tool_system_prompt_template
-        )
-        system_message = system_message_prompt_template.format(
-            tools=json.dumps(functions, indent=2)
-        )
-        response_message = super()._generate(
-            [system_message] + messages, stop=stop, run_manager=run_manager, **kwargs
-        )
+        if self.use_json_schema_format:
+            system_message = _tool_system_message(
+                COMPACT_SYSTEM_TEMPLATE, _describe_tools(functions)
+            )
+            kwargs["format"] = tools_to_json_schema(functions)
+        else:
+            system_message = _tool_system_message(
+                self.tool_system_prompt_template,
+                json.dumps(functions, separators=(",", ":")),
+            )
+        return functions, system_message
+
+    def _parse_tool_result(
+        self, response_message: ChatResult, functions: List[Dict]
+    ) -> ChatResult:
+        """Turn the model's JSON reply into a tool call or a conversational message.
+
+        Shared by `_generate` and `_agenerate`.
+        """
         chat_generation_content = response_message.generations[0].text
         if not isinstance(chat_generation_content, str):
             raise ValueError("OllamaFunctions does not support non-string output.")
@@ -325,21 +409,22 @@ class OllamaFunctions(ChatOllama):
                 Please try again. 
                 Response: {chat_generation_content}"""
             )
-        called_tool_name = (
-            parsed_chat_result["tool"] if "tool" in parsed_chat_result else None
-        )
+        if not isinstance(parsed_chat_result, dict):
+            raise ValueError(
+                f"Failed to parse a response from {self.model} output: "
+                f"{chat_generation_content}"
+            )
+        called_tool_name = parsed_chat_result.get("tool")
         called_tool = next(
             (fn for fn in functions if fn["name"] == called_tool_name), None
         )
+        tool_input = parsed_chat_result.get("tool_input")
         if (
             called_tool is None
             or called_tool["name"] == DEFAULT_RESPONSE_FUNCTION["name"]
         ):
-            if (
-                "tool_input" in parsed_chat_result
-                and "response" in parsed_chat_result["tool_input"]
-            ):
-                response = parsed_chat_result["tool_input"]["response"]
+            if isinstance(tool_input, dict) and "response" in tool_input:
+                response = tool_input["response"]
             elif "response" in parsed_chat_result:
                 response = parsed_chat_result["response"]
             else:
@@ -357,18 +442,12 @@ class OllamaFunctions(ChatOllama):
                 ]
             )
 
-        called_tool_arguments = (
-            parsed_chat_result["tool_input"]
-            if "tool_input" in parsed_chat_result
-            else {}
-        )
-
         response_message_with_functions = AIMessage(
             content="",
             tool_calls=[
                 ToolCall(
                     name=called_tool_name,
-                    args=called_tool_arguments if called_tool_arguments else {},
+                    args=tool_input if isinstance(tool_input, dict) else {},
                     id=f"call_{str(uuid.uuid4()).replace('-', '')}",
                 )
             ],
@@ -378,6 +457,19 @@ class OllamaFunctions(ChatOllama):
             generations=[ChatGeneration(message=response_message_with_functions)]
         )
 
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        functions, system_message = self._prepare_tool_request(kwargs)
+        response_message = super()._generate(
+            [system_message] + messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        return self._parse_tool_result(response_message, functions)
+
     async def _agenerate(
         self,
         messages: List[BaseMessage],
@@ -385,77 +477,40 @@ class OllamaFunctions(ChatOllama):
         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> ChatResult:
-        functions = kwargs.get("functions", [])
-        if "functions" in kwargs:
-            del kwargs["functions"]
-        if "function_call" in kwargs:
-            functions = [
-                fn for fn in functions if fn["name"] == kwargs["function_call"]["name"]
-            ]
-            if not functions:
-                raise ValueError(
-                    "If `function_call` is specified, you must also pass a "
-                    "matching function in `functions`."
-                )
-            del kwargs["function_call"]
-        elif not functions:
-            functions.append(DEFAULT_RESPONSE_FUNCTION)
-        if _is_pydantic_class(functions[0]):
-            functions = [convert_to_ollama_tool(fn) for fn in functions]
-        system_message_prompt_template = SystemMessagePromptTemplate.from_template(
-            self.tool_system_prompt_template
-        )
-        system_message = system_message_prompt_template.format(
-            tools=json.dumps(functions, indent=2)
-        )
+        functions, system_message = self._prepare_tool_request(kwargs)
         response_message = await super()._agenerate(
             [system_message] + messages, stop=stop, run_manager=run_manager, **kwargs
         )
-        chat_generation_content = response_message.generations[0].text
-        if not isinstance(chat_generation_content, str):
-            raise ValueError("OllamaFunctions does not support non-string output.")
-        try:
-            parsed_chat_result = json.loads(chat_generation_content)
-        except json.JSONDecodeError:
-            raise ValueError(
-                f"""'{self.model}' did not respond with valid JSON. 
-                Please try again. 
-                Response: {chat_generation_content}"""
-            )
-        called_tool_name = parsed_chat_result["tool"]
-        called_tool_arguments = parsed_chat_result["tool_input"]
-        called_tool = next(
-            (fn for fn in functions if fn["name"] == called_tool_name), None
-        )
-        if called_tool is None:
-            raise ValueError(
-                f"Failed to parse a function call from {self.model} output: "
-                f"{chat_generation_content}"
-            )
-        if called_tool["name"] == DEFAULT_RESPONSE_FUNCTION["name"]:
-            return ChatResult(
-                generations=[
-                    ChatGeneration(
-                        message=AIMessage(
-                            content=called_tool_arguments["response"],
-                        )
-                    )
-                ]
-            )
+        return self._parse_tool_result(response_message, functions)
 
-        response_message_with_functions = AIMessage(
-            content="",
-            additional_kwargs={
-                "function_call": {
-                    "name": called_tool_name,
-                    "arguments": json.dumps(called_tool_arguments)
-                    if called_tool_arguments
-                    else "",
-                },
-            },
-        )
-        return ChatResult(
-            generations=[ChatGeneration(message=response_message_with_functions)]
+    async def aextract_many(
+        self,
+        inputs: Sequence[LanguageModelInput],
+        schema: Union[Dict, Type[BaseModel]],
+        *,
+        max_concurrency: int = 4,
+        include_raw: bool = False,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Run many structured extractions concurrently.
+
+        Args:
+            inputs: One model input (e.g. a prompt string) per extraction.
+            schema: The output schema, see `with_structured_output`.
+            max_concurrency: Maximum number of requests in flight at once; match
+                it to the server's OLLAMA_NUM_PARALLEL.
+            include_raw: See `with_structured_output`.
+            return_exceptions: If True, a failed extraction yields its exception
+                instead of cancelling the others.
+
+        Returns:
+            The structured output for each input, in the order of `inputs`.
+        """
+        structured_llm = self.with_structured_output(schema, include_raw=include_raw)
+        return await structured_llm.abatch(
+            list(inputs),
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=return_exceptions,
         )
 
     @property
@@ -1,39 +1,289 @@
 # src/pdf_processing/extract_text.py
 
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
 import pdfplumber
 import fitz  # PyMuPDF
 
-def extract_text_from_pdf(file_path):
+from src.pdf_processing.extraction_cache import content_hash, get_extraction_cache
+
+# Bump whenever extract_pages changes its output so stale cache entries are ignored.
+EXTRACTOR_VERSION = "pages-1"
+
+# Documents shorter than this are not worth the process start-up cost.
+MIN_PAGES_FOR_PARALLEL = 16
+
+# A page whose text is mostly unreadable glyphs is re-extracted with pdfplumber.
+GARBLED_RATIO = 0.3
+_GARBLED_RE = re.compile(r"\(cid:\d+\)|\ufffd|[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def is_garbled(text):
+    """
+    Checks whether extracted page text is mostly unmapped glyphs or control characters.
+
+    Parameters:
+    text (str): Text extracted from a single page.
+
+    Returns:
+    bool: True if the text should be re-extracted with another backend.
+    """
+    if not text.strip():
+        return False
+    bad = sum(len(match) for match in _GARBLED_RE.findall(text))
+    return bad / len(text) > GARBLED_RATIO
+
+
+def _open_documents(file_path):
+    """
+    Opens the PDF with PyMuPDF and returns it with a factory for a pdfplumber handle.
+
+    pdfplumber is slow to open, so its handle is only created when a page needs it.
     """
-    Extracts text from a text-based PDF using pdfplumber and PyMuPDF as a fallback.
-    
+    if hasattr(file_path, "read"):
+        file_path.seek(0)
+        data = file_path.read()
+        return fitz.open(stream=data, filetype="pdf"), lambda: pdfplumber.open(io.BytesIO(data))
+    return fitz.open(file_path), lambda: pdfplumber.open(file_path)
+
+
+def extract_pages(file_path, start=0, end=None):
+    """
+    Extracts pages one by one, trying PyMuPDF first and pdfplumber only for pages
+    that come back empty or garbled.
+
+    Parameters:
+    file_path (str or file-like object): The PDF file.
+    start (int): Index of the first page to extract.
+    end (int): Index one past the last page to extract (defaults to the last page).
+
+    Returns:
+    list of dict: One dictionary per page with "page" (1-based number), "text",
+    "backend" ("pymupdf", "pdfplumber" or None if both failed) and "seconds" keys.
+    """
+    pdf_document, open_plumber = _open_documents(file_path)
+    plumber_pdf = None
+    pages = []
+    try:
+        end = pdf_document.page_count if end is None else min(end, pdf_document.page_count)
+        for index in range(start, end):
+            started = time.perf_counter()
+            backend = "pymupdf"
+            try:
+                text = pdf_document[index].get_text()
+            except Exception as e:
+                print(f"PyMuPDF failed on page {index + 1}. Error:", e)
+                text = ""
+
+            if not text.strip() or is_garbled(text):
+                try:
+                    if plumber_pdf is None:
+                        plumber_pdf = open_plumber()
+                    fallback_text = plumber_pdf.pages[index].extract_text() or ""
+                    if fallback_text.strip() and not is_garbled(fallback_text):
+                        text, backend = fallback_text, "pdfplumber"
+                except Exception as e:
+                    print(f"pdfplumber failed on page {index + 1}. Error:", e)
+                if backend == "pymupdf" and not text.strip():
+                    backend = None
+
+            pages.append({
+                "page": index + 1,
+                "text": text,
+                "backend": backend,
+                "seconds": time.perf_counter() - started,
+            })
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+        pdf_document.close()
+
+    return pages
+
+
+def _split_page_range(page_count, parts):
+    """
+    Splits range(page_count) into at most `parts` contiguous (start, end) ranges.
+    """
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _terminate_workers(executor):
+    """
+    Kills the worker processes of a pool, e.g. ones stuck on a page, so neither
+    `shutdown` nor interpreter exit waits for them.
+    """
+    processes = list((executor._processes or {}).values())
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+def extract_pages_parallel(file_path, max_workers=None, page_timeout=30):
+    """
+    Runs `extract_pages` over the page range using a pool of worker processes.
+
+    The page range is split into one contiguous block per worker, and each
+    worker opens its own handle to the file. The blocks share one deadline of
+    `page_timeout` seconds per page of the largest block; blocks still running
+    then are reported as empty pages and the pool's processes are killed.
+
     Parameters:
     file_path (str): Path to the PDF file.
-    
+    max_workers (int): Number of worker processes (defaults to the CPU count).
+    page_timeout (float): Seconds allowed per page, or None for no limit.
+
     Returns:
-    str: Extracted text from the PDF.
+    list of dict: Per-page results as returned by `extract_pages`, in page order.
+    """
+    with fitz.open(file_path) as pdf_document:
+        page_count = pdf_document.page_count
+    if page_count < MIN_PAGES_FOR_PARALLEL:
+        return extract_pages(file_path)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    ranges = _split_page_range(page_count, max_workers)
+    timeout = page_timeout * max(end - start for start, end in ranges) if page_timeout else None
+
+    pages = []
+    pending = set()
+    executor = ProcessPoolExecutor(max_workers=len(ranges))
+    try:
+        futures = [executor.submit(extract_pages, file_path, start, end) for start, end in ranges]
+        _, pending = wait(futures, timeout=timeout)
+        for (start, end), future in zip(ranges, futures):
+            if future in pending:
+                print(f"Extraction timed out on pages {start + 1}-{end}.")
+                pages.extend(
+                    {"page": i + 1, "text": "", "backend": None, "seconds": timeout, "error": "timeout"}
+                    for i in range(start, end)
+                )
+            else:
+                pages.extend(future.result())
+    finally:
+        if pending:
+            _terminate_workers(executor)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return pages
+
+
+def document_cache_key(file_path):
+    """
+    Returns the extraction cache key of a PDF: a hash of its whole content plus
+    the extractor version. Callers that look up many pages of one upload can
+    compute it once and pass it as `cache_key`.
+    """
+    return f"{content_hash(file_path)}:{EXTRACTOR_VERSION}"
+
+
+def get_page_count(file_path, use_cache=True, cache_key=None):
+    """
+    Returns the number of pages in the PDF.
+
+    Parameters:
+    file_path (str or file-like object): The PDF file.
+    use_cache (bool): Look the count up in (and store it to) the extraction cache.
+    cache_key (str): The `document_cache_key` of the file, if already known.
+
+    Returns:
+    int: Number of pages.
+    """
+    cache = get_extraction_cache() if use_cache else None
+    key = (cache_key or document_cache_key(file_path)) if cache else None
+    page_count = cache.get_page_count(key) if cache else None
+    if page_count is None:
+        pdf_document, _ = _open_documents(file_path)
+        with pdf_document:
+            page_count = pdf_document.page_count
+        if cache:
+            cache.set_page_count(key, page_count)
+    return page_count
+
+
+def extract_page_text(file_path, page_number, use_cache=True, cache_key=None):
+    """
+    Extracts the text of a single page, e.g. for a page preview.
+
+    Parameters:
+    file_path (str or file-like object): The PDF file.
+    page_number (int): 1-based page number.
+    use_cache (bool): Look the page up in (and store it to) the extraction cache.
+    cache_key (str): The `document_cache_key` of the file, if already known.
+
+    Returns:
+    str: Text of the page.
     """
-    text = ""
+    cache = get_extraction_cache() if use_cache else None
+    key = (cache_key or document_cache_key(file_path)) if cache else None
+    page = cache.get_page(key, page_number) if cache else None
+    if page is None:
+        page = extract_pages(file_path, page_number - 1, page_number)[0]
+        if cache:
+            cache.put_pages(key, [page])
+    return page["text"]
+
 
-    # Primary method: Attempt to extract text using pdfplumber
+def extract_page_texts(file_path, parallel=False, max_workers=None, page_timeout=30, use_cache=True):
+    """
+    Extracts the text of every page, using the extraction cache when possible.
+
+    Parameters:
+    file_path (str or file-like object): The PDF file.
+    parallel (bool): Split the pages across a process pool (only for file paths).
+    max_workers (int): Number of worker processes in parallel mode.
+    page_timeout (float): Seconds allowed per page in parallel mode.
+    use_cache (bool): Reuse page text cached for identical PDF content.
+
+    Returns:
+    list of str: Text of each page, in page order.
+    """
+    cache = get_extraction_cache() if use_cache else None
+    key = document_cache_key(file_path) if cache else None
+    pages = cache.get_pages(key) if cache else None
+    if pages is None:
+        if parallel and isinstance(file_path, (str, os.PathLike)):
+            pages = extract_pages_parallel(file_path, max_workers=max_workers, page_timeout=page_timeout)
+        else:
+            pages = extract_pages(file_path)
+        if cache:
+            # Pages that timed out are retried on the next call rather than cached.
+            cache.put_pages(key, [page for page in pages if "error" not in page], page_count=len(pages))
+    return [page["text"] for page in pages]
+
+
+def extract_text_from_pdf(file_path, parallel=False, max_workers=None, page_timeout=30, use_cache=True):
+    """
+    Extracts text from a text-based PDF, page by page, using PyMuPDF with
+    pdfplumber as a per-page fallback.
+
+    Parameters:
+    file_path (str or file-like object): The PDF file.
+    parallel (bool): Split the pages across a process pool (only for file paths).
+    max_workers (int): Number of worker processes in parallel mode.
+    page_timeout (float): Seconds allowed per page in parallel mode.
+    use_cache (bool): Reuse page text cached for identical PDF content.
+
+    Returns:
+    str: Extracted text from the PDF.
+    """
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        pages = extract_page_texts(file_path, parallel, max_workers, page_timeout, use_cache)
     except Exception as e:
-        print("pdfplumber failed. Error:", e)
-        text = ""  # Reset text if pdfplumber fails
+        print("PDF extraction failed. Error:", e)
+        return ""
 
-    # Fallback method: If pdfplumber fails, use PyMuPDF (fitz)
-    if not text.strip():
-        try:
-            pdf_document = fitz.open(file_path)
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                text += page.get_text() + "\n"
-        except Exception as e:
-            print("PyMuPDF also failed. Error:", e)
-    
-    return text.strip()
+    return "\n".join(page for page in pages if page).strip()
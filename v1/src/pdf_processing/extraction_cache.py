@@ -0,0 +1,155 @@
+# src/pdf_processing/extraction_cache.py
+
+import hashlib
+import os
+import time
+import zlib
+from functools import lru_cache
+
+from src.sqlite_store import SQLiteLRUStore
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "extracted_pages.sqlite3")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # Compressed page text kept on disk
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def content_hash(source):
+    """
+    Computes the SHA-256 hash of a PDF's bytes.
+
+    Parameters:
+    source (bytes, str or file-like object): Raw bytes, a file path or an open binary file.
+
+    Returns:
+    str: Hex digest of the content.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif hasattr(source, "read"):
+        source.seek(0)
+        for block in iter(lambda: source.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache(SQLiteLRUStore):
+    """
+    On-disk store of extracted page text, keyed by content hash and extractor version.
+
+    Page text is zlib-compressed in SQLite. When the total stored size exceeds
+    `max_bytes`, the least recently used documents are evicted.
+    """
+
+    ENTRIES_TABLE = "documents"
+    DEPENDENT_TABLES = ("pages",)
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path, max_bytes, [
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "key TEXT PRIMARY KEY, page_count INTEGER, bytes INTEGER NOT NULL DEFAULT 0, "
+            "last_access REAL NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL, backend TEXT, "
+            "seconds REAL, PRIMARY KEY (key, page))",
+        ])
+
+    def _touch(self, key):
+        self._conn.execute(
+            "INSERT INTO documents (key, last_access) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET last_access = excluded.last_access",
+            (key, time.time()),
+        )
+
+    @staticmethod
+    def _row_to_page(row):
+        page, text, backend, seconds = row
+        return {"page": page, "text": zlib.decompress(text).decode("utf-8"), "backend": backend, "seconds": seconds}
+
+    def get_pages(self, key):
+        """
+        Returns every cached page of a document, or None unless all pages are cached.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT page_count FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT page, text, backend, seconds FROM pages WHERE key = ? ORDER BY page", (key,)
+            ).fetchall()
+            if len(rows) != row[0]:
+                return None
+            self._touch(key)
+        return [self._row_to_page(r) for r in rows]
+
+    def get_page(self, key, page):
+        """
+        Returns one cached page (1-based number) of a document, or None.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT page, text, backend, seconds FROM pages WHERE key = ? AND page = ?", (key, page)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(key)
+        return self._row_to_page(row)
+
+    def get_page_count(self, key):
+        """
+        Returns the cached page count of a document, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT page_count FROM documents WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_pages(self, key, pages, page_count=None):
+        """
+        Stores extracted pages (dicts as returned by `extract_pages`) for a document.
+
+        Parameters:
+        key (str): Cache key of the document.
+        pages (list of dict): Pages with "page", "text" and optionally "backend" and "seconds".
+        page_count (int): Total number of pages in the document, if known.
+        """
+        rows = [
+            (key, p["page"], zlib.compress(p["text"].encode("utf-8")), p.get("backend"), p.get("seconds"))
+            for p in pages
+        ]
+        with self._lock, self._conn:
+            self._touch(key)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (key, page, text, backend, seconds) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "UPDATE documents SET bytes = (SELECT COALESCE(SUM(LENGTH(text)), 0) FROM pages WHERE key = ?), "
+                "page_count = COALESCE(?, page_count) WHERE key = ?",
+                (key, page_count, key),
+            )
+            self._evict(keep=key)
+
+    def set_page_count(self, key, page_count):
+        with self._lock, self._conn:
+            self._touch(key)
+            self._conn.execute("UPDATE documents SET page_count = ? WHERE key = ?", (page_count, key))
+
+    def stats(self):
+        """
+        Returns the number of cached documents and their total compressed size in bytes.
+        """
+        documents, size = self._totals()
+        return {"documents": documents, "bytes": size, "max_bytes": self.max_bytes}
+
+
+@lru_cache(maxsize=None)
+def get_extraction_cache():
+    """
+    Returns the process-wide extraction cache, creating it on first use.
+    """
+    return ExtractionCache()
@@ -1,23 +1,113 @@
 # src/pdf_processing/pdf_ingestion.py
 
+import mmap
+import os
+import shutil
+import tempfile
+
 import fitz  # PyMuPDF
 
-def ingest_pdf(uploaded_file):
+from src.pdf_processing.extraction_cache import content_hash, get_extraction_cache
+from src.text_processing.chunk_text import iter_chunk_text
+from src.text_processing.clean_text import iter_clean_text
+
+# Bump whenever ingest_pdf changes its output so stale cache entries are ignored.
+INGEST_VERSION = "pymupdf-1"
+
+
+def ingest_pdf(uploaded_file, use_cache=True):
     """
     Extract text from a PDF file.
 
     Parameters:
     uploaded_file (file-like object): The uploaded PDF file.
+    use_cache (bool): Reuse page text cached for identical PDF content.
 
     Returns:
     str: Extracted text from the PDF.
     """
-    # Open the PDF file
-    pdf_document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-    
-    text = ""
-    for page in pdf_document:
-        text += page.get_text()  # Extract text from each page
-
-    pdf_document.close()
-    return text
+    data = uploaded_file.read()
+
+    cache = get_extraction_cache() if use_cache else None
+    key = f"{content_hash(data)}:{INGEST_VERSION}" if cache else None
+    pages = cache.get_pages(key) if cache else None
+
+    if pages is None:
+        # Open the PDF file
+        pdf_document = fitz.open(stream=data, filetype="pdf")
+        pages = [
+            {"page": number, "text": page.get_text(), "backend": "pymupdf"}
+            for number, page in enumerate(pdf_document, start=1)
+        ]
+        pdf_document.close()
+        if cache:
+            cache.put_pages(key, pages, page_count=len(pages))
+
+    return "".join(page["text"] for page in pages)
+
+
+def iter_pdf_pages(uploaded_file, use_cache=True):
+    """
+    Lazily yields the text of each page of a PDF without reading the whole file into memory.
+
+    An upload is first spooled to a temporary file in fixed-size blocks. The file is
+    memory-mapped to compute its cache key, and PyMuPDF opens it from disk so pages
+    are only read as they are requested.
+
+    Parameters:
+    uploaded_file (str or file-like object): Path to the PDF or the uploaded PDF file.
+    use_cache (bool): Reuse (and store) page text cached for identical PDF content.
+
+    Yields:
+    str: Text of each page, in page order.
+    """
+    temp_path = None
+    if hasattr(uploaded_file, "read"):
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+            shutil.copyfileobj(uploaded_file, temp_file)
+            temp_path = temp_file.name
+        file_path = temp_path
+    else:
+        file_path = uploaded_file
+
+    try:
+        cache = get_extraction_cache() if use_cache else None
+        key = None
+        if cache:
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                key = f"{content_hash(mapped)}:{INGEST_VERSION}"
+
+        with fitz.open(file_path) as pdf_document:
+            if cache:
+                cache.set_page_count(key, pdf_document.page_count)
+            for number in range(1, pdf_document.page_count + 1):
+                page = cache.get_page(key, number) if cache else None
+                if page is None:
+                    page = {"page": number, "text": pdf_document.load_page(number - 1).get_text(), "backend": "pymupdf"}
+                    if cache:
+                        cache.put_pages(key, [page])
+                yield page["text"]
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+
+def iter_document_chunks(uploaded_file, chunk_size, chunk_overlap, use_cache=True):
+    """
+    Streams a PDF through page extraction, cleaning and chunking.
+
+    Only the current page and the partially filled chunk are held in memory, so
+    chunks can be passed on to embedding before the rest of the document is read.
+
+    Parameters:
+    uploaded_file (str or file-like object): Path to the PDF or the uploaded PDF file.
+    chunk_size (int): The maximum size of each chunk (in tokens).
+    chunk_overlap (int): The maximum number of overlapping tokens between chunks.
+    use_cache (bool): Reuse (and store) page text cached for identical PDF content.
+
+    Yields:
+    str: Text chunks, in document order.
+    """
+    pages = iter_pdf_pages(uploaded_file, use_cache=use_cache)
+    yield from iter_chunk_text(iter_clean_text(pages), chunk_size, chunk_overlap)
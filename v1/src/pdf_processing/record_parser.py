@@ -0,0 +1,87 @@
+# src/pdf_processing/record_parser.py
+
+import re
+
+import fitz  # PyMuPDF
+
+# Columns of the species records, as written by test.py
+FIELDNAMES = ["Scientific Name", "Threat Category", "English Name", "Local Name"]
+
+
+# Fields start a line (after optional indentation). Anchoring every alternative
+# on the newline lets the regex engine jump from line to line with a fast literal
+# search, so one scan over the page finds every field in document order.
+_FIELD_RE = re.compile(
+    r"\n[^\S\n]*(?:"
+    r"Scientific Name:[^\S\n]*(?P<scientific>[^\n]*)"
+    r"|<(?P<category>[^<>\n]*)>[^\n]*"
+    r"|English Name:[^\S\n]*(?P<english>[^\n]*)"
+    r"|Local Name:[^\S\n]*(?P<local>[^\n]*)"
+    r")"
+)
+
+
+def _record(fields):
+    # Names keep their first two words (genus and species, or a short common name)
+    english = fields.get("english")
+    local = fields.get("local")
+    return {
+        "Scientific Name": " ".join(fields["scientific"].split()[:2]),
+        "Threat Category": fields["category"].strip(),
+        "English Name": " ".join(english.split()[:2]) if english is not None else None,
+        "Local Name": " ".join(local.split()[:2]) if local is not None else None,
+    }
+
+
+def parse_page_records(text):
+    """
+    Parses the species records on one page of a Red Book in a single pass.
+
+    A record is made of "Scientific Name:", "English Name:" and "Local Name:"
+    lines and a threat category line such as "<EN>", in any order. A field that
+    the current record already has starts the next record, so every record on a
+    multi-species page is kept.
+
+    Parameters:
+    text (str): Text of the page.
+
+    Returns:
+    list of dict: Records keyed by `FIELDNAMES`, in page order. Records without
+    both a scientific name and a threat category are dropped.
+    """
+    records = []
+    fields = {}
+    for match in _FIELD_RE.finditer("\n" + text):
+        field = match.lastgroup
+        if field in fields:
+            if "scientific" in fields and "category" in fields:
+                records.append(_record(fields))
+            fields = {}
+        fields[field] = match[field]
+
+    if "scientific" in fields and "category" in fields:
+        records.append(_record(fields))
+    return records
+
+
+def parse_pdf_records(file_path, start=0, end=None):
+    """
+    Parses the species records on a range of pages of a PDF.
+
+    Parameters:
+    file_path (str): Path to the PDF file.
+    start (int): Index of the first page to parse.
+    end (int): Index after the last page to parse (defaults to the page count).
+
+    Returns:
+    list of dict: Records with a "Page" (1-based number) key added, in page order.
+    """
+    records = []
+    with fitz.open(file_path) as document:
+        end = document.page_count if end is None else min(end, document.page_count)
+        for page_number in range(start, end):
+            text = document.load_page(page_number).get_text("text")
+            for record in parse_page_records(text):
+                record["Page"] = page_number + 1
+                records.append(record)
+    return records
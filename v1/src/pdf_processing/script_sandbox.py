@@ -0,0 +1,295 @@
+# src/pdf_processing/script_sandbox.py
+
+import contextlib
+import io
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import resource
+except ImportError:  # Windows: scripts run without CPU and memory limits
+    resource = None
+
+# Imported once in the fork server, so every worker starts with them loaded
+PRELOAD_MODULES = ["fitz", "pdfplumber", "csv", "json", "re"]
+
+DEFAULT_WORKERS = os.cpu_count() or 2  # Started on demand
+DEFAULT_MAX_JOBS = 20  # Jobs a worker runs before it is replaced by a fresh one
+DEFAULT_TIMEOUT = 120.0  # Wall-clock seconds per script
+DEFAULT_CPU_SECONDS = 60
+DEFAULT_MEMORY_BYTES = 2 * 1024 * 1024 * 1024  # Address space a script may add to the warm worker
+DEFAULT_MAX_OUTPUT_BYTES = 16 * 1024 * 1024  # Captured stdout/stderr and output file sent back
+
+ScriptResult = namedtuple("ScriptResult", ["ok", "stdout", "stderr", "error", "output", "seconds"])
+
+
+def _address_space():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _limit_memory(memory_bytes):
+    if resource is None or not memory_bytes:
+        return
+    try:
+        limit = _address_space() + memory_bytes
+    except (OSError, ValueError):  # No /proc (macOS): cap the whole worker instead
+        limit = memory_bytes
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _limit_cpu(cpu_seconds):
+    # RLIMIT_CPU counts the worker's CPU time since it started, so each job's limit
+    # is set relative to what the earlier jobs used. None lifts the limit again.
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds is None:
+        soft = hard
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + 1 + int(cpu_seconds)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _truncate(text, max_bytes):
+    if len(text) <= max_bytes:
+        return text
+    return text[:max_bytes] + f"\n... [truncated {len(text) - max_bytes} characters]"
+
+
+def _run_job(script_code, args, output_path, cwd, cpu_seconds, max_output_bytes):
+    """
+    Runs a script in the worker as `python script.py *args` would from `cwd`, in a
+    fresh namespace.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    error = None
+    saved_argv, saved_cwd = list(sys.argv), os.getcwd()
+    started = time.perf_counter()
+    try:
+        sys.argv = ["generated_script.py", *args]
+        os.chdir(cwd)
+        code = compile(script_code, "generated_script.py", "exec")
+        _limit_cpu(cpu_seconds)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                exec(code, {"__name__": "__main__", "__file__": "generated_script.py", "__builtins__": __builtins__})
+            except SystemExit as e:
+                if e.code not in (None, 0):
+                    error = f"Script exited with status {e.code}"
+    except MemoryError:
+        error = "Script exceeded the memory limit"
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        _limit_cpu(None)
+        seconds = time.perf_counter() - started
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+
+    output = None
+    if error is None and output_path:
+        output_path = os.path.join(cwd, output_path)
+        if not os.path.isfile(output_path):
+            error = f"Script wrote no output file at {output_path}"
+        elif os.path.getsize(output_path) <= max_output_bytes:
+            with open(output_path, "rb") as f:
+                output = f.read()
+    return ScriptResult(
+        ok=error is None,
+        stdout=_truncate(stdout.getvalue(), max_output_bytes),
+        stderr=_truncate(stderr.getvalue(), max_output_bytes),
+        error=error,
+        output=output,
+        seconds=seconds,
+    )
+
+
+def _worker_main(conn, memory_bytes):
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+    _limit_memory(memory_bytes)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+        conn.send(_run_job(*job))
+
+
+class _Worker:
+    def __init__(self, context, memory_bytes):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_bytes), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=1.0)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _failure(message, seconds):
+    return ScriptResult(ok=False, stdout="", stderr="", error=message, output=None, seconds=seconds)
+
+
+class ScriptSandbox:
+    """
+    Pool of warm worker processes that run generated scraper scripts.
+
+    Workers are forked from a server that has already imported `PRELOAD_MODULES`,
+    so a script does not pay interpreter startup and the `fitz` import. Each
+    script gets a wall-clock timeout (the worker is killed and replaced when it
+    runs over), a CPU-time limit and a cap on the memory it may allocate. Its
+    stdout, stderr and output file come back over a pipe. Workers are replaced
+    after `max_jobs` scripts, so state left behind by one script (imported
+    modules, leaked memory) does not pile up.
+
+    The limits guard against runaway scripts, not hostile ones: a script can
+    still read and write any file the app can.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_jobs=DEFAULT_MAX_JOBS, timeout=DEFAULT_TIMEOUT,
+                 cpu_seconds=DEFAULT_CPU_SECONDS, memory_bytes=DEFAULT_MEMORY_BYTES,
+                 max_output_bytes=DEFAULT_MAX_OUTPUT_BYTES):
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if self.context.get_start_method() == "forkserver":
+            self.context.set_forkserver_preload(PRELOAD_MODULES + [__name__])
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.max_output_bytes = max_output_bytes
+        self._idle = []
+        self._started = 0  # Workers alive, busy or idle
+        self._available = threading.Condition()
+
+    def _acquire(self):
+        with self._available:
+            while not self._idle and self._started >= self.workers:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            return _Worker(self.context, self.memory_bytes)
+        except BaseException:
+            with self._available:
+                self._started -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, worker, healthy):
+        if not healthy or worker.jobs >= self.max_jobs:
+            worker.stop() if healthy else worker.kill()
+            with self._available:
+                self._started -= 1
+                self._available.notify()
+            return
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def warmup(self):
+        """
+        Starts all workers ahead of the first script.
+        """
+        workers = [self._acquire() for _ in range(self.workers)]
+        for worker in workers:
+            self._release(worker, True)
+
+    def run(self, script_code, args=(), output_path=None, timeout=None):
+        """
+        Runs a script in a sandbox worker.
+
+        Parameters:
+        script_code (str): Python source of the script.
+        args (list of str): Command-line arguments, available to the script as `sys.argv[1:]`.
+        output_path (str): File the script writes; its content is returned in `output`,
+            and the run fails if the script did not create it.
+        timeout (float): Wall-clock limit in seconds (defaults to the pool's `timeout`).
+
+        Returns:
+        ScriptResult: "ok", captured "stdout" and "stderr", "error" (the traceback or
+        the limit that was hit, None on success), "output" (bytes of `output_path`,
+        or None) and "seconds" the script ran.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        # Relative paths are resolved against the caller's working directory, as
+        # for a subprocess; the worker was started from wherever the pool was.
+        job = (script_code, list(args), output_path, os.getcwd(), self.cpu_seconds, self.max_output_bytes)
+        worker = self._acquire()
+        started = time.perf_counter()
+        healthy = False
+        try:
+            worker.conn.send(job)
+            worker.jobs += 1
+            if not worker.conn.poll(timeout):
+                return _failure(f"Script timed out after {timeout:.0f} seconds", time.perf_counter() - started)
+            try:
+                result = worker.conn.recv()
+            except EOFError:
+                worker.process.join(timeout=1.0)
+                return _failure(self._describe_exit(worker.process.exitcode), time.perf_counter() - started)
+            healthy = True
+            return result
+        except (OSError, BrokenPipeError) as e:
+            return _failure(f"Sandbox worker failed: {e}", time.perf_counter() - started)
+        finally:
+            self._release(worker, healthy)
+
+    def _describe_exit(self, exitcode):
+        if exitcode == -getattr(signal, "SIGXCPU", 0):
+            return f"Script exceeded the CPU time limit of {self.cpu_seconds} seconds"
+        if exitcode == -signal.SIGKILL:
+            return "Script was killed (out of memory?)"
+        return f"Sandbox worker exited with status {exitcode}"
+
+    def close(self):
+        """
+        Stops the idle workers.
+        """
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.stop()
+
+
+@lru_cache(maxsize=None)
+def get_script_sandbox(workers=DEFAULT_WORKERS):
+    """
+    Returns the process-wide script sandbox.
+    """
+    return ScriptSandbox(workers=workers)
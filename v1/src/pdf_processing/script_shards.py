@@ -0,0 +1,250 @@
+# src/pdf_processing/script_shards.py
+
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+
+from src.pdf_processing.script_sandbox import ScriptResult, get_script_sandbox
+
+MIN_PAGES_PER_SHARD = 8  # Smaller shards cost more in PDF copies than they save
+
+# Calling convention of generated scripts, for the prompts that ask for them
+SCRIPT_ARGS_INSTRUCTIONS = """The script is run as: python script.py <pdf_path> <output_path> <page_offset>
+- Read the PDF path from sys.argv[1] and write the output file to sys.argv[2]. Do not hard-code either path.
+- The PDF may be a part of a larger document. If the output records page numbers, add
+  page_offset = int(sys.argv[3]) if len(sys.argv) > 3 else 0 to them (page number = page index + 1 + page_offset)."""
+
+# Column names or keys that hold page numbers in a script's output
+PAGE_FIELDS = {"page", "page number", "page_number", "page_num", "pagenumber", "page no", "page_no"}
+
+_ARGV_RE = {index: re.compile(rf"\bargv\s*\[\s*{index}\s*\]") for index in (1, 2)}
+
+
+def shard_ranges(page_count, shards, min_pages=MIN_PAGES_PER_SHARD):
+    """
+    Splits pages into at most `shards` contiguous ranges of near-equal size.
+
+    Returns:
+    list of tuple: (start, end) page indexes, end exclusive, in page order.
+    """
+    shards = max(1, min(shards, page_count // min_pages or 1))
+    size, extra = divmod(page_count, shards)
+    ranges = []
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def split_pdf(pdf_path, ranges, directory):
+    """
+    Writes each page range of a PDF to its own file.
+
+    Returns:
+    list of str: Paths of the shard PDFs, in the order of `ranges`.
+    """
+    paths = []
+    with fitz.open(pdf_path) as document:
+        for index, (start, end) in enumerate(ranges):
+            path = os.path.join(directory, f"shard-{index:03d}.pdf")
+            with fitz.open() as shard:
+                shard.insert_pdf(document, from_page=start, to_page=end - 1)
+                shard.save(path, garbage=1)
+            paths.append(path)
+    return paths
+
+
+def reads_script_args(script_code):
+    """
+    Checks whether a script takes its PDF and output paths from `sys.argv`, as
+    sharded runs require, rather than hard-coding them.
+    """
+    return all(pattern.search(script_code) for pattern in _ARGV_RE.values())
+
+
+def _page_key(keys):
+    for key in keys:
+        if isinstance(key, str) and key.strip().lower() in PAGE_FIELDS:
+            return key
+    return None
+
+
+def _check_pages(values, pages):
+    # Page numbers written by a shard must fall into its page range, or the script
+    # ignored the page offset and the merged output would repeat pages 1, 2, ...
+    start, end = pages
+    for value in values:
+        try:
+            page = int(value)
+        except (TypeError, ValueError):
+            continue
+        if not start < page <= end:
+            raise ValueError(
+                f"the shard with pages {start + 1}-{end} wrote page number {page}; "
+                "the script does not add the page offset from sys.argv[3]"
+            )
+
+
+def _json_items(value):
+    if isinstance(value, list):
+        return value
+    return [item for items in value.values() for item in items]
+
+
+def _merge_json(parts, ranges):
+    values = [json.loads(part) for part in parts]
+    if all(isinstance(value, list) for value in values):
+        merged = [item for value in values for item in value]
+    elif all(isinstance(value, dict) for value in values) and all(
+        isinstance(item, list) for value in values for item in value.values()
+    ):
+        # {"species": [...]}-style outputs: concatenate the lists under each key
+        merged = {}
+        for value in values:
+            for key, items in value.items():
+                merged.setdefault(key, []).extend(items)
+    else:
+        raise ValueError("shard outputs are not all JSON lists or all objects of lists, so they cannot be merged")
+
+    for value, pages in zip(values, ranges):
+        records = [item for item in _json_items(value) if isinstance(item, dict)]
+        key = _page_key({key for record in records for key in record})
+        if key is not None:
+            _check_pages([record.get(key) for record in records], pages)
+    return merged
+
+
+def merge_outputs(parts, ranges, output_path):
+    """
+    Combines the outputs of the shards, in page order, into one file.
+
+    CSV outputs keep the header row of the first shard only, JSON lists (or
+    objects of lists) are concatenated, and other outputs are joined as is. A
+    "Page" column or key must hold page numbers of the whole document.
+
+    Parameters:
+    parts (list of bytes): Output of each shard, in page order.
+    ranges (list of tuple): (start, end) page indexes of each shard.
+    output_path (str): File the merged output is written to.
+
+    Returns:
+    bytes: The merged output.
+
+    Raises:
+    ValueError: If the outputs cannot be merged, or page numbers are not offset.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == ".csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header = None
+        for part, pages in zip(parts, ranges):
+            rows = list(csv.reader(io.StringIO(part.decode("utf-8-sig"))))
+            if not rows:
+                continue
+            if header is None:
+                header = rows[0]
+                writer.writerow(header)
+            if rows[0] == header:
+                rows = rows[1:]  # Shards without a header row write data only
+            key = _page_key(header)
+            if key is not None:
+                column = header.index(key)
+                _check_pages([row[column] for row in rows if len(row) > column], pages)
+            writer.writerows(rows)
+        merged = buffer.getvalue().encode("utf-8")
+    elif extension == ".json":
+        written = [(part, pages) for part, pages in zip(parts, ranges) if part.strip()]
+        merged = _merge_json([part for part, _ in written], [pages for _, pages in written])
+        merged = json.dumps(merged, indent=4).encode("utf-8")
+    else:
+        merged = b"".join(parts)
+
+    with open(output_path, "wb") as f:
+        f.write(merged)
+    return merged
+
+
+def run_sharded(script_code, pdf_path, output_path, shards=None, sandbox=None):
+    """
+    Runs a generated script on page-range shards of a PDF in parallel and merges
+    the outputs in page order.
+
+    Each shard is a PDF of its own, passed to the script as `sys.argv[1]` with a
+    shard output file as `sys.argv[2]` and the number of pages before the shard as
+    `sys.argv[3]`, following `SCRIPT_ARGS_INSTRUCTIONS`. The run fails if the
+    script hard-codes its paths, or writes page numbers without that offset.
+
+    Parameters:
+    script_code (str): Python source of the script.
+    pdf_path (str): Path to the PDF file.
+    output_path (str): File the merged CSV or JSON output is written to.
+    shards (int): Number of shards (defaults to the number of sandbox workers).
+    sandbox (ScriptSandbox): Pool that runs the shards (defaults to the shared one).
+
+    Returns:
+    ScriptResult: Combined result; "error" names the page range of the first
+    failed shard, and "seconds" is the wall-clock time of the whole run.
+    """
+    sandbox = sandbox or get_script_sandbox()
+    started = time.perf_counter()
+    if not reads_script_args(script_code):
+        error = "The script does not read its PDF and output paths from sys.argv[1] and sys.argv[2]"
+        return ScriptResult(False, "", "", error, None, 0.0)
+    directory = tempfile.mkdtemp(prefix="script-shards-")
+    extension = os.path.splitext(output_path)[1]
+    try:
+        with fitz.open(pdf_path) as document:
+            page_count = document.page_count
+        if page_count == 0:
+            return ScriptResult(False, "", "", "The PDF has no pages", None, time.perf_counter() - started)
+        ranges = shard_ranges(page_count, shards or sandbox.workers)
+        shard_paths = split_pdf(pdf_path, ranges, directory)
+        jobs = [
+            (path, os.path.join(directory, f"shard-{index:03d}{extension}"), str(start))
+            for index, (path, (start, _)) in enumerate(zip(shard_paths, ranges))
+        ]
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            results = list(executor.map(lambda job: sandbox.run(script_code, list(job)), jobs))
+
+        stdout = []
+        stderr = []
+        for (start, end), result in zip(ranges, results):
+            label = f"[pages {start + 1}-{end}]"
+            if result.stdout:
+                stdout.append(f"{label}\n{result.stdout}")
+            if result.stderr:
+                stderr.append(f"{label}\n{result.stderr}")
+        failed = [(pages, result) for pages, result in zip(ranges, results) if not result.ok]
+        if failed:
+            (start, end), result = failed[0]
+            error = f"Shard with pages {start + 1}-{end} failed:\n{result.error}"
+            return ScriptResult(False, "\n".join(stdout), "\n".join(stderr), error, None, time.perf_counter() - started)
+
+        missing = [pages for pages, (_, path, _) in zip(ranges, jobs) if not os.path.isfile(path)]
+        if missing:
+            start, end = missing[0]
+            error = f"Shard with pages {start + 1}-{end} wrote no output file"
+            return ScriptResult(False, "\n".join(stdout), "\n".join(stderr), error, None, time.perf_counter() - started)
+
+        parts = []
+        for _, path, _ in jobs:
+            with open(path, "rb") as f:
+                parts.append(f.read())
+        output = merge_outputs(parts, ranges, output_path)
+        return ScriptResult(True, "\n".join(stdout), "\n".join(stderr), None, output, time.perf_counter() - started)
+    except (ValueError, RuntimeError, OSError) as e:
+        # Unreadable PDF, or outputs that cannot be merged
+        return ScriptResult(False, "", "", f"Sharded run failed: {e}", None, time.perf_counter() - started)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
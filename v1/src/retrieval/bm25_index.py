@@ -0,0 +1,128 @@
+# src/retrieval/bm25_index.py
+
+import json
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Keeps short tokens such as the IUCN codes "CR" and "EN"; matching is case-insensitive
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase word tokens for lexical matching.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of chunks, backed by a compact inverted index.
+
+    Each term maps to a slice of two shared int32 arrays holding the ids of the
+    chunks containing it and its frequency in each, so scoring a query only
+    touches the postings of its terms.
+    """
+
+    def __init__(self, documents, metadatas, terms, offsets, doc_ids, term_freqs, doc_lengths, k1=1.5, b=0.75):
+        self.documents = documents
+        self.metadatas = metadatas
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        n = len(documents)
+        self.avg_length = float(doc_lengths.mean()) if n else 0.0
+        document_freqs = np.diff(offsets)
+        self.idf = np.log1p((n - document_freqs + 0.5) / (document_freqs + 0.5)).astype(np.float32)
+        # Per-document part of the BM25 denominator, precomputed once
+        self._norm = (k1 * (1 - b + b * doc_lengths / (self.avg_length or 1.0))).astype(np.float32)
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, chunks, source=None, k1=1.5, b=0.75):
+        """
+        Builds the index over a document's chunks.
+
+        Parameters:
+        chunks (list of str or dict): Text chunks, or dictionaries with "text" and
+            optionally "page", "end_page" and "offset" keys (see `chunk_text.chunk_pages`).
+        source (str): Name of the source document, stored in the chunk metadata.
+
+        Returns:
+        BM25Index: The index.
+        """
+        documents, metadatas, doc_lengths = [], [], []
+        postings = defaultdict(list)
+        for doc_id, chunk in enumerate(chunks):
+            if isinstance(chunk, str):
+                chunk = {"text": chunk}
+            metadata = {"source": source or "unknown"}
+            metadata.update({key: chunk[key] for key in ("page", "end_page", "offset") if chunk.get(key) is not None})
+            tokens = tokenize(chunk["text"])
+            for term, freq in Counter(tokens).items():
+                postings[term].append((doc_id, freq))
+            documents.append(chunk["text"])
+            metadatas.append(metadata)
+            doc_lengths.append(len(tokens))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        flat = [posting for term in terms for posting in postings[term]]
+        doc_ids = np.array([doc_id for doc_id, _ in flat], dtype=np.int32)
+        term_freqs = np.array([freq for _, freq in flat], dtype=np.int32)
+        return cls(documents, metadatas, terms, offsets, doc_ids, term_freqs,
+                   np.array(doc_lengths, dtype=np.float32), k1, b)
+
+    def scores(self, query):
+        """
+        Returns the BM25 score of every chunk for a query string.
+        """
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            index = self.terms.get(term)
+            if index is None:
+                continue
+            start, end = self.offsets[index], self.offsets[index + 1]
+            ids = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end].astype(np.float32)
+            scores[ids] += self.idf[index] * tf * (self.k1 + 1) / (tf + self._norm[ids])
+        return scores
+
+    def search(self, query, k):
+        """
+        Returns up to `k` (chunk index, score) pairs with a positive score, best first.
+        """
+        scores = self.scores(query)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, path):
+        """
+        Saves the index to `<path>.npz` (postings) and `<path>.json` (chunks).
+        """
+        np.savez_compressed(path + ".npz", offsets=self.offsets, doc_ids=self.doc_ids,
+                            term_freqs=self.term_freqs, doc_lengths=self.doc_lengths)
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"terms": sorted(self.terms, key=self.terms.get), "documents": self.documents,
+                       "metadatas": self.metadatas, "k1": self.k1, "b": self.b}, f)
+
+    @classmethod
+    def load(cls, path):
+        arrays = np.load(path + ".npz")
+        with open(path + ".json", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["documents"], data["metadatas"], data["terms"], arrays["offsets"], arrays["doc_ids"],
+                   arrays["term_freqs"], arrays["doc_lengths"], data["k1"], data["b"])
@@ -0,0 +1,60 @@
+# src/retrieval/hybrid_search.py
+
+from collections import defaultdict
+
+from src.retrieval.retrieve_chunks import retrieve_similar_chunks
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """
+    Fuses several rankings with reciprocal rank fusion.
+
+    Parameters:
+    rankings (list of list): Rankings of hashable keys, best first.
+    rrf_k (int): Damping constant; larger values flatten the contribution of top ranks.
+
+    Returns:
+    list: Keys ordered by fused score, best first.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] += 1.0 / (rrf_k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
+
+
+def retrieve_hybrid(query_text, collection, bm25_index, top_k=3, candidates=20, rrf_k=60, use_cache=True):
+    """
+    Retrieves chunks by fusing BM25 and vector search results with reciprocal rank fusion.
+
+    Exact scientific names and category codes are matched lexically by BM25, while
+    the vector search covers paraphrases. The vector search goes through
+    `retrieve_similar_chunks`, so repeated queries are served from its result
+    cache until chunks are added to the collection.
+
+    Parameters:
+    query_text (str): The text query.
+    collection (Chroma or NumpyVectorIndex): The collection holding the chunk embeddings.
+    bm25_index (BM25Index): Index built over the same chunks.
+    top_k (int): Number of chunks to return.
+    candidates (int): Number of results taken from each retriever before fusion.
+    rrf_k (int): Reciprocal rank fusion constant.
+    use_cache (bool): Whether to use the result cache of the vector search.
+
+    Returns:
+    list of dict: List of dictionaries with "chunk" and "metadata" keys.
+    """
+    found = {}
+    vector_ranking = []
+    for result in retrieve_similar_chunks(query_text, collection, top_k=candidates, use_cache=use_cache):
+        found.setdefault(result["chunk"], result["metadata"])
+        vector_ranking.append(result["chunk"])
+
+    lexical_ranking = []
+    for index, _ in bm25_index.search(query_text, candidates):
+        text = bm25_index.documents[index]
+        found.setdefault(text, bm25_index.metadatas[index])
+        lexical_ranking.append(text)
+
+    fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], rrf_k)
+    return [{"chunk": text, "metadata": found[text]} for text in fused[:top_k]]
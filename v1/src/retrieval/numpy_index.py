@@ -0,0 +1,202 @@
+# src/retrieval/numpy_index.py
+
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+# Mirrors the attributes of LangChain's Document used by retrieve_similar_chunks
+SearchResult = namedtuple("SearchResult", ["page_content", "metadata", "score"])
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorIndex:
+    """
+    In-process vector index ranking chunks by cosine similarity.
+
+    Embeddings are kept L2-normalized in one contiguous float32 matrix, so a search
+    is a single matrix-vector (or matrix-matrix, for batched queries) product
+    followed by `np.argpartition`. Implements the parts of the Chroma collection
+    API used by retrieve_chunks.py, so it can stand in for a Chroma collection.
+    """
+
+    def __init__(self, embedding_function, path=None):
+        self.embedding_function = embedding_function
+        self.path = path
+        self.metadata = {}
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self._rows = {}
+        self._matrix = None  # Rows past len(self.ids) are spare capacity
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    @property
+    def matrix(self):
+        """
+        The normalized embedding matrix, one row per chunk.
+        """
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[:len(self.ids)]
+
+    # Chroma collection API used by add_chunks_to_chroma and index_document
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, ids=None, include=None):
+        found = [id_ for id_ in ids if id_ in self._rows] if ids is not None else list(self.ids)
+        return {"ids": found}
+
+    def modify(self, metadata=None):
+        self.metadata = dict(metadata or {})
+
+    def upsert(self, ids, embeddings, documents, metadatas=None):
+        """
+        Inserts chunks, or replaces the chunks whose ids already exist.
+        """
+        vectors = _normalize(embeddings)
+        metadatas = metadatas or [{} for _ in ids]
+        new = [i for i, id_ in enumerate(ids) if id_ not in self._rows]
+        self._reserve(len(self.ids) + len(new), vectors.shape[1])
+
+        for i, id_ in enumerate(ids):
+            row = self._rows.get(id_)
+            if row is None:
+                row = len(self.ids)
+                self._rows[id_] = row
+                self.ids.append(id_)
+                self.documents.append(documents[i])
+                self.metadatas.append(metadatas[i])
+            else:
+                self.documents[row] = documents[i]
+                self.metadatas[row] = metadatas[i]
+            self._matrix[row] = vectors[i]
+
+    def _reserve(self, rows, dim):
+        # Grow geometrically so repeated upserts copy the matrix O(log n) times
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"Expected {self._matrix.shape[1]}-dimensional vectors, got {dim}.")
+        if self._matrix is not None and rows <= len(self._matrix) and self._matrix.flags.writeable:
+            return
+        capacity = max(rows, 2 * len(self._matrix) if self._matrix is not None else 64)
+        matrix = np.empty((capacity, dim), dtype=np.float32)
+        if self.ids:
+            matrix[:len(self.ids)] = self.matrix
+        self._matrix = matrix
+
+    # Search
+
+    def search_by_vectors(self, query_vectors, k):
+        """
+        Finds the top `k` chunks for each query vector.
+
+        Parameters:
+        query_vectors (array of shape (m, d)): Query embeddings.
+        k (int): Number of chunks to return per query.
+
+        Returns:
+        tuple of (array, array): Row indices and cosine similarities of shape (m, k'),
+        where k' = min(k, number of chunks), best match first.
+        """
+        queries = _normalize(np.atleast_2d(query_vectors))
+        n = len(self.ids)
+        k = min(k, n)
+        if k == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+        scores = queries @ self.matrix.T
+        if k < n:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(queries), n))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def _results(self, rows, scores):
+        return [
+            SearchResult(self.documents[row], self.metadatas[row], float(score))
+            for row, score in zip(rows, scores)
+        ]
+
+    def similarity_search(self, query, k=4):
+        """
+        Returns the `k` chunks most similar to a query string.
+        """
+        rows, scores = self.search_by_vectors(self.embedding_function.embed_query(query), k)
+        return self._results(rows[0], scores[0])
+
+    def similarity_search_batch(self, queries, k=4):
+        """
+        Returns the `k` most similar chunks for each of several query strings,
+        embedding all queries in one call and ranking them with one matrix product.
+        """
+        if not queries:
+            return []
+        embed = getattr(self.embedding_function, "embed_queries", self.embedding_function.embed_documents)
+        rows, scores = self.search_by_vectors(embed(list(queries)), k)
+        return [self._results(r, s) for r, s in zip(rows, scores)]
+
+    # Persistence
+
+    def save(self, path=None):
+        """
+        Saves the matrix to `<path>.npy` and the chunks and metadata to `<path>.json`.
+        """
+        path = path or self.path
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write to temporary files and rename them, so a memory map of the previous
+        # file (possibly our own matrix) stays valid
+        with open(path + ".npy.tmp", "wb") as f:
+            np.save(f, self.matrix)
+        with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {"metadata": self.metadata, "ids": self.ids, "documents": self.documents, "metadatas": self.metadatas},
+                f,
+            )
+        os.replace(path + ".npy.tmp", path + ".npy")
+        os.replace(path + ".json.tmp", path + ".json")
+
+    @classmethod
+    def load(cls, path, embedding_function, mmap=True):
+        """
+        Loads an index saved with `save`. With `mmap`, the matrix is memory-mapped
+        read-only and only copied into memory when chunks are added.
+        """
+        index = cls(embedding_function, path=path)
+        with open(path + ".json", encoding="utf-8") as f:
+            data = json.load(f)
+        index.metadata = data["metadata"]
+        index.ids = data["ids"]
+        index.documents = data["documents"]
+        index.metadatas = data["metadatas"]
+        index._rows = {id_: row for row, id_ in enumerate(index.ids)}
+        if index.ids:
+            index._matrix = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        return index
+
+    @classmethod
+    def open(cls, path, embedding_function):
+        """
+        Loads the index at `path` if it was saved before, otherwise creates an empty one.
+        """
+        if os.path.exists(path + ".json"):
+            return cls.load(path, embedding_function)
+        return cls(embedding_function, path=path)
@@ -1,55 +1,359 @@
 # src/retrieval/retrieve_chunks.py
 
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import chromadb
 from chromadb.config import Settings
 from langchain.vectorstores import Chroma
 from langchain.embeddings import HuggingFaceEmbeddings
 
-def initialize_chroma_collection(collection_name="document_chunks"):
+from src.embeddings.embedding_cache import CachedEmbeddings, LRUCache
+from src.pdf_processing.extraction_cache import content_hash
+from src.retrieval.bm25_index import BM25Index
+from src.retrieval.numpy_index import NumpyVectorIndex
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHROMA_PERSIST_DIRECTORY = os.path.join("data", "chroma")
+
+# Top-k results of recent queries, see `retrieve_similar_chunks`
+RESULT_CACHE = LRUCache(maxsize=512)
+
+@lru_cache(maxsize=None)
+def get_chroma_client(persist_directory=CHROMA_PERSIST_DIRECTORY):
+    """
+    Returns the process-wide ChromaDB client storing collections in `persist_directory`.
+    """
+    return chromadb.PersistentClient(path=persist_directory, settings=Settings(anonymized_telemetry=False))
+
+@lru_cache(maxsize=None)
+def get_embedding_function(model_name=EMBEDDING_MODEL):
+    """
+    Returns the process-wide embedding model, so it is only loaded once.
+    Chunks embedded before are served from the embedding cache.
+    """
+    return CachedEmbeddings(HuggingFaceEmbeddings(model_name=model_name), model_name)
+
+@lru_cache(maxsize=None)
+def initialize_chroma_collection(collection_name="document_chunks", persist_directory=CHROMA_PERSIST_DIRECTORY, backend="chroma"):
     """
     Initializes a ChromaDB collection for storing embeddings.
     
+    The collection is stored on disk and reused across calls and app reruns.
+    
     Parameters:
     collection_name (str): Name of the collection to initialize.
+    persist_directory (str): Directory where ChromaDB stores its data.
+    backend (str): "chroma", or "numpy" for a lightweight in-process index
+        (see `numpy_index.NumpyVectorIndex`) saved as .npy/.json files.
     
     Returns:
-    Chroma: The LangChain Chroma wrapper instance.
+    Chroma or NumpyVectorIndex: The collection instance.
+    """
+    if backend == "numpy":
+        collection = NumpyVectorIndex.open(os.path.join(persist_directory, "numpy", collection_name), get_embedding_function())
+    elif backend == "chroma":
+        client = get_chroma_client(persist_directory)
+
+        # Initialize the Chroma collection
+        collection = Chroma(collection_name=collection_name, embedding_function=get_embedding_function(), client=client)
+    else:
+        raise ValueError(f"Unknown retrieval backend: {backend}")
+
+    # The BM25 index of the chunks is stored next to the collection (see `index_document`)
+    collection._bm25_path = os.path.join(persist_directory, "bm25", backend, collection_name)
+    return collection
+
+def _store(collection):
+    """
+    Returns the object implementing the Chroma collection API: the raw ChromaDB
+    collection behind a LangChain wrapper, or the collection itself.
+    """
+    return getattr(collection, "_collection", collection)
+
+def collection_version(collection):
+    """
+    Returns a value that changes whenever chunks are added to the collection.
+    Combines a counter bumped by `add_chunks_to_chroma` with the chunk count, so
+    chunks added by another process are noticed too.
     """
-    # Configure Chroma to use local storage
-    client_settings = Settings()
-    client = chromadb.Client(client_settings)
+    return getattr(collection, "_version", 0), _store(collection).count()
+
+def _collection_key(collection):
+    store = _store(collection)
+    return getattr(store, "name", None) or getattr(collection, "path", None) or id(collection)
+
+def document_collection_name(document_hash, variant=None):
+    """
+    Returns the collection name of a document, derived from the hash of its content.
     
-    # Initialize the embedding model
-    embedding_function = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    Parameters:
+    document_hash (str): SHA-256 hex digest of the PDF bytes.
+    variant (str): Optional suffix separating indexes of the same document built
+        with different settings (e.g. chunk size).
     
-    # Initialize the Chroma collection
-    collection = Chroma(collection_name=collection_name, embedding_function=embedding_function, client=client)
+    Returns:
+    str: A valid ChromaDB collection name.
+    """
+    name = f"doc_{document_hash[:32]}"
+    return f"{name}_{variant}" if variant else name
+
+def initialize_document_collection(pdf_source, variant=None, persist_directory=CHROMA_PERSIST_DIRECTORY, backend="chroma"):
+    """
+    Initializes the collection of one document, namespaced by the hash of its content.
     
-    return collection
+    Parameters:
+    pdf_source (bytes, str or file-like object): The PDF bytes, path or uploaded file.
+    variant (str): Optional suffix, see `document_collection_name`.
+    persist_directory (str): Directory where ChromaDB stores its data.
+    backend (str): "chroma" or "numpy", see `initialize_chroma_collection`.
+    
+    Returns:
+    Chroma or NumpyVectorIndex: The collection instance.
+    """
+    name = document_collection_name(content_hash(pdf_source), variant)
+    return initialize_chroma_collection(name, persist_directory, backend)
+
+def is_document_indexed(collection):
+    """
+    Checks whether `index_document` has completed for this collection.
+    """
+    store = _store(collection)
+    metadata = store.metadata or {}
+    return metadata.get("indexed_chunks") is not None and metadata["indexed_chunks"] == store.count()
 
-def add_chunks_to_chroma(chunks, collection):
+def index_document(chunks, collection, source=None):
     """
-    Adds text chunks to the ChromaDB collection using LangChain's Chroma wrapper.
+    Adds a document's chunks to its collection unless it is already indexed.
+    
+    The BM25 index of the chunks is built and saved next to the collection at the
+    same time, see `get_bm25_index`.
     
     Parameters:
-    chunks (list of str): List of text chunks.
-    collection (Chroma): The Chroma collection instance.
+    chunks (list of str or dict): Text chunks, see `add_chunks_to_chroma`.
+    collection (Chroma or NumpyVectorIndex): The document's collection (see `initialize_document_collection`).
+    source (str): Name of the source document, stored in the chunk metadata.
+    
+    Returns:
+    bool: True if the chunks were added, False if the document was already indexed.
     """
-    # Adding text chunks directly to Chroma, where embeddings are handled internally
-    collection.add_texts(texts=chunks)
+    if is_document_indexed(collection):
+        return False
+    add_chunks_to_chroma(chunks, collection, source=source)
+    _save_bm25_index(collection, BM25Index.build(chunks, source=source))
+    _store(collection).modify(metadata={"indexed_chunks": _store(collection).count()})
+    if isinstance(collection, NumpyVectorIndex):
+        collection.save()
+    return True
+
+def _save_bm25_index(collection, bm25_index):
+    path = getattr(collection, "_bm25_path", None)
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        bm25_index.save(path)
+    collection._bm25 = (collection_version(collection), bm25_index)
 
-def retrieve_similar_chunks(query_text, collection, top_k=3):
+def _stored_chunks(collection):
+    if isinstance(collection, NumpyVectorIndex):
+        documents, metadatas = collection.documents, collection.metadatas
+    else:
+        stored = _store(collection).get(include=["documents", "metadatas"])
+        documents, metadatas = stored["documents"], stored["metadatas"]
+    return [{"text": document, **(metadata or {})} for document, metadata in zip(documents, metadatas)]
+
+def get_bm25_index(collection):
+    """
+    Returns the BM25 index of an indexed collection's chunks.
+    
+    The index saved by `index_document` is loaded once per collection version. A
+    collection indexed without one (e.g. before BM25 indexes were saved) gets it
+    rebuilt from its stored chunks and saved.
+    
+    Parameters:
+    collection (Chroma or NumpyVectorIndex): The collection (see `initialize_document_collection`).
+    
+    Returns:
+    BM25Index: The index.
+    """
+    version = collection_version(collection)
+    cached = getattr(collection, "_bm25", None)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    path = getattr(collection, "_bm25_path", None)
+    if path is not None and os.path.exists(path + ".npz") and os.path.exists(path + ".json"):
+        bm25_index = BM25Index.load(path)
+        collection._bm25 = (version, bm25_index)
+        return bm25_index
+    chunks = _stored_chunks(collection)
+    source = chunks[0].get("source") if chunks else None
+    bm25_index = BM25Index.build(chunks, source=source)
+    _save_bm25_index(collection, bm25_index)
+    return bm25_index
+
+def chunk_id(text, source=None, page=None, offset=None):
+    """
+    Returns a deterministic id for a chunk, so adding the same chunk again updates it in place.
+    """
+    key = "\x00".join(str(part) for part in (source, page, offset, text))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+def add_chunks_to_chroma(chunks, collection, source=None, batch_size=128, max_workers=4):
+    """
+    Upserts text chunks into the ChromaDB collection with deterministic ids.
+    
+    Chunks already in the collection are skipped. The remaining chunks are embedded
+    in batches on a thread pool and each batch is written with one bulk upsert.
+    
+    Parameters:
+    chunks (list of str or dict): Text chunks, or dictionaries with "text" and
+        optionally "page", "end_page" and "offset" keys (see `chunk_text.chunk_pages`).
+    collection (Chroma or NumpyVectorIndex): The collection instance.
+    source (str): Name of the source document, stored in the chunk metadata.
+    batch_size (int): Number of chunks embedded and written per batch.
+    max_workers (int): Number of batches embedded in parallel.
+    """
+    records = {}
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = {"text": chunk}
+        metadata = {"source": source or "unknown"}
+        metadata.update({key: chunk[key] for key in ("page", "end_page", "offset") if chunk.get(key) is not None})
+        id_ = chunk_id(chunk["text"], source, chunk.get("page"), chunk.get("offset"))
+        records.setdefault(id_, (chunk["text"], metadata))  # Duplicate ids in one upsert are rejected
+
+    store = _store(collection)
+    ids = list(records)
+    batches = []
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        existing = set(store.get(ids=batch_ids, include=[])["ids"])
+        batch_ids = [id_ for id_ in batch_ids if id_ not in existing]
+        if batch_ids:
+            batches.append(batch_ids)
+
+    def embed(batch_ids):
+        return collection.embeddings.embed_documents([records[id_][0] for id_ in batch_ids])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch_ids, embeddings in zip(batches, executor.map(embed, batches)):
+            store.upsert(
+                ids=batch_ids,
+                embeddings=embeddings,
+                documents=[records[id_][0] for id_ in batch_ids],
+                metadatas=[records[id_][1] for id_ in batch_ids],
+            )
+    if batches:
+        # Invalidates cached results of this collection (see `retrieve_similar_chunks`)
+        collection._version = getattr(collection, "_version", 0) + 1
+
+    if isinstance(collection, NumpyVectorIndex):
+        collection.save()
+
+def retrieve_similar_chunks(query_text, collection, top_k=3, use_cache=True):
     """
     Retrieves the top K most similar chunks to a query using LangChain's Chroma wrapper.
     
+    Results are cached in `RESULT_CACHE`, keyed by query, embedding model and
+    collection version, so adding chunks to the collection invalidates them.
+    
     Parameters:
     query_text (str): The text query to embed and retrieve similar chunks for.
-    collection (Chroma): The Chroma collection instance.
+    collection (Chroma or NumpyVectorIndex): The collection instance.
     top_k (int): Number of top similar chunks to retrieve.
+    use_cache (bool): Whether to look up and store the results in `RESULT_CACHE`.
     
     Returns:
     list of dict: List of dictionaries with "chunk" and "metadata" keys.
     """
+    if use_cache:
+        model = getattr(collection.embeddings, "model_name", None)
+        key = (query_text, model, _collection_key(collection), collection_version(collection), top_k)
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+
     results = collection.similarity_search(query_text, k=top_k)
+    results = [{"chunk": result.page_content, "metadata": result.metadata} for result in results]
+    if use_cache:
+        RESULT_CACHE.put(key, results)
+        return [dict(result) for result in results]
+    return results
+
+def retrieval_cache_stats(collection=None):
+    """
+    Returns the hit and miss counters of the result cache and of the query embedding
+    cache of the collection's embedding model (by default, the shared model).
+    """
+    embeddings = collection.embeddings if collection is not None else get_embedding_function()
+    return {
+        "results": RESULT_CACHE.stats(),
+        "query_embeddings": embeddings.query_cache.stats(),
+    }
+
+
+def _embed_queries(collection, queries):
+    embeddings = collection.embeddings
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(list(queries))
+    # Not embed_documents: models with query prefixes embed queries differently
+    return [embeddings.embed_query(query) for query in queries]
+
+def retrieve_similar_chunks_batch(queries, collection, top_k=3, deduplicate=True):
+    """
+    Retrieves the top K most similar chunks for each of several queries.
+    
+    Queries are embedded with the model's query embedding (cached ones are reused)
+    and searched with one vectorized query against the collection.
     
-    return [{"chunk": result.page_content, "metadata": result.metadata} for result in results]
+    Parameters:
+    queries (list of str): The text queries.
+    collection (Chroma or NumpyVectorIndex): The collection instance.
+    top_k (int): Number of top similar chunks to retrieve per query.
+    deduplicate (bool): Whether to return a chunk retrieved by several queries only
+        once, for the query it matches best (ties go to the earlier query).
+    
+    Returns:
+    list of list of dict: For each query, a list of dictionaries with "chunk",
+    "metadata" and "score" (cosine similarity, or negated distance for Chroma) keys,
+    best match first.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    query_embeddings = _embed_queries(collection, queries)
+
+    if isinstance(collection, NumpyVectorIndex):
+        rows, scores = collection.search_by_vectors(query_embeddings, top_k)
+        hits = [
+            [(collection.ids[row], collection.documents[row], collection.metadatas[row], float(score))
+             for row, score in zip(query_rows, query_scores)]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+    else:
+        results = _store(collection).query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"],
+        )
+        hits = [
+            [(id_, document, metadata, -float(distance))
+             for id_, document, metadata, distance in zip(ids, documents, metadatas, distances)]
+            for ids, documents, metadatas, distances in zip(
+                results["ids"], results["documents"], results["metadatas"], results["distances"]
+            )
+        ]
+
+    if deduplicate:
+        best = {}  # Chunk id -> (score, query index) of its best match
+        for i, query_hits in enumerate(hits):
+            for id_, _, _, score in query_hits:
+                if id_ not in best or score > best[id_][0]:
+                    best[id_] = (score, i)
+        hits = [[hit for hit in query_hits if best[hit[0]][1] == i] for i, query_hits in enumerate(hits)]
+
+    return [
+        [{"chunk": document, "metadata": metadata, "score": score} for _, document, metadata, score in query_hits]
+        for query_hits in hits
+    ]
@@ -0,0 +1,66 @@
+# src/sqlite_store.py
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteLRUStore:
+    """
+    Base of the on-disk caches: one SQLite database, size-bounded by least
+    recently used eviction.
+
+    Subclasses name the table that holds one row per entry in `ENTRIES_TABLE`,
+    with "key", "bytes" and "last_access" columns, and tables whose rows belong
+    to an entry (and go with it) in `DEPENDENT_TABLES`. Statements run under
+    `with self._lock, self._conn:`.
+    """
+
+    ENTRIES_TABLE = None
+    DEPENDENT_TABLES = ()
+
+    def __init__(self, path, max_bytes, schema):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Streamlit runs each session in its own thread, so share one guarded connection.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            for statement in schema:
+                self._conn.execute(statement)
+
+    def _delete(self, key):
+        for table in (*self.DEPENDENT_TABLES, self.ENTRIES_TABLE):
+            self._conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+
+    def _purge(self):
+        """
+        Deletes entries that must go regardless of size; called before evicting.
+        """
+
+    def _evict(self, keep=None):
+        # Called with the lock held, inside the transaction of a write
+        self._purge()
+        total = self._conn.execute(f"SELECT COALESCE(SUM(bytes), 0) FROM {self.ENTRIES_TABLE}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            f"SELECT key, bytes FROM {self.ENTRIES_TABLE} WHERE key != ? ORDER BY last_access", (keep,)
+        ).fetchall():
+            self._delete(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _totals(self):
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM {self.ENTRIES_TABLE}"
+            ).fetchone()
+
+    def clear(self):
+        with self._lock, self._conn:
+            for table in (*self.DEPENDENT_TABLES, self.ENTRIES_TABLE):
+                self._conn.execute(f"DELETE FROM {table}")
@@ -1,34 +1,263 @@
 # src/text_processing/chunk_text.py
 
 import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from functools import lru_cache
 
-def chunk_text(text, chunk_size, chunk_overlap):
+# Tokenizer of the embedding model used for retrieval (see retrieval/retrieve_chunks.py)
+DEFAULT_TOKENIZER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Bump whenever chunk_pages changes its output, so documents indexed before are re-chunked.
+CHUNKING_VERSION = "2"
+
+# Chunks are only cut between segments: at sentence ends (not after an initial
+# such as "P. tigris") and before each species record. Cleaned text has no line
+# breaks left, so paragraphs are not boundaries.
+_BOUNDARY_RE = re.compile(
+    r"(?<=[.!?])(?<!\b[A-Z]\.)\s+(?=[A-Z0-9\"'(\[<])"
+    r"|\s+(?=Scientific Name:)"
+)
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_token_count(text):
+    """
+    Counts words and punctuation marks as a rough stand-in for model tokens.
+    """
+    return len(_WORD_RE.findall(text))
+
+
+def _approximate_token_spans(text):
+    return [match.span() for match in _WORD_RE.finditer(text)]
+
+
+class TokenCounter:
+    """
+    Counts the tokens of a string; `spans` returns the (start, end) character
+    offsets of each token, so long text can be split after tokenizing it once.
+    """
+
+    def __init__(self, count, spans):
+        self.count = count
+        self.spans = spans
+
+    def __call__(self, text):
+        return self.count(text)
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model_name=DEFAULT_TOKENIZER_MODEL):
+    """
+    Returns a function that counts tokens the way the embedding model does.
+
+    Parameters:
+    model_name (str): Hugging Face name of the embedding model.
+
+    Returns:
+    TokenCounter: Callable taking a string and returning its token count. Falls back
+    to `approximate_token_count` if the tokenizer cannot be loaded.
+    """
+    approximate = TokenCounter(approximate_token_count, _approximate_token_spans)
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+    except Exception as e:
+        print("Tokenizer unavailable, using approximate token counts. Error:", e)
+        return approximate
+    def count(text):
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    def spans(text):
+        return tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+
+    # Only fast tokenizers report offsets; with others, long segments are split word by word
+    return TokenCounter(count, spans if tokenizer.is_fast else None)
+
+
+def _iter_segments(pieces):
+    """
+    Splits a stream of text pieces into whitespace-normalized segments in one pass.
+
+    Text after the last boundary of a piece is carried over to the next piece, so
+    segments spanning a page break are kept whole.
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        last_end = 0
+        for match in _BOUNDARY_RE.finditer(buffer):
+            if match.end() == len(buffer):
+                break  # The boundary may continue in the next piece
+            segment = " ".join(buffer[last_end:match.start()].split())
+            if segment:
+                yield segment
+            last_end = match.end()
+        buffer = buffer[last_end:]
+
+    segment = " ".join(buffer.split())
+    if segment:
+        yield segment
+
+
+def _split_long_segment(segment, chunk_size, length_function):
+    """
+    Splits a segment longer than `chunk_size` tokens at word boundaries.
+    A single word longer than `chunk_size` is kept whole.
+
+    Yields:
+    tuple: Each part and its token count.
+    """
+    spans = getattr(length_function, "spans", None)
+    if spans is None:
+        # Plain counting function: count word by word
+        words = []
+        size = 0
+        for word in segment.split(" "):
+            n = length_function(word)
+            if words and size + n > chunk_size:
+                yield " ".join(words), size
+                words, size = [], 0
+            words.append(word)
+            size += n
+        if words:
+            yield " ".join(words), size
+        return
+
+    # Tokenize once and cut at the last space before the token that would overflow
+    starts = [start for start, _ in spans(segment)]
+    first, position = 0, 0  # First token and first character of the current part
+    while first + chunk_size < len(starts):
+        overflow = starts[first + chunk_size]
+        cut = segment.rfind(" ", position + 1, overflow + 1)
+        if cut == -1:
+            cut = segment.find(" ", overflow)
+            if cut == -1:
+                break
+        following = bisect_left(starts, cut + 1, first)
+        yield segment[position:cut], following - first
+        first, position = following, cut + 1
+    if position < len(segment):
+        yield segment[position:], len(starts) - first
+
+
+def iter_chunk_text(text, chunk_size, chunk_overlap, length_function=None):
+    """
+    Lazily splits text into chunks of at most `chunk_size` tokens.
+
+    Makes a single pass over the text. Chunks end on sentence or record boundaries
+    and start with up to `chunk_overlap` tokens of whole segments from the end of
+    the previous chunk.
+
+    Parameters:
+    text (str or iterable of str): The input text, or a stream of text pieces such as pages.
+    chunk_size (int): The maximum size of each chunk (in tokens).
+    chunk_overlap (int): The maximum number of overlapping tokens between chunks.
+    length_function (callable): Counts the tokens in a string (defaults to the
+        embedding model's tokenizer).
+
+    Yields:
+    str: Text chunks, in document order.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size.")
+    if length_function is None:
+        length_function = get_token_counter()
+    if isinstance(text, str):
+        text = (text,)
+
+    window = deque()  # (segment, token count) pairs of the current chunk
+    window_size = 0
+    fresh = False  # Whether the window holds text not yet emitted
+
+    for segment in _iter_segments(text):
+        n = length_function(segment)
+        parts = [(segment, n)] if n <= chunk_size else _split_long_segment(segment, chunk_size, length_function)
+        for part, n in parts:
+            if window and window_size + n > chunk_size:
+                if fresh:
+                    yield " ".join(s for s, _ in window)
+                    fresh = False
+                    # Keep whole segments from the end as overlap, but always drop at least one
+                    kept, kept_size = 0, 0
+                    for _, size in reversed(window):
+                        if kept == len(window) - 1 or kept_size + size > chunk_overlap:
+                            break
+                        kept += 1
+                        kept_size += size
+                    for _ in range(len(window) - kept):
+                        window_size -= window.popleft()[1]
+                while window and window_size + n > chunk_size:
+                    window_size -= window.popleft()[1]
+            window.append((part, n))
+            window_size += n
+            fresh = True
+
+    if fresh:
+        yield " ".join(s for s, _ in window)
+
+
+def chunk_text(text, chunk_size, chunk_overlap, length_function=None):
     """
     Splits the text into overlapping chunks of specified size.
-    
+
     Parameters:
     text (str): The input text to be chunked.
-    chunk_size (int): The maximum size of each chunk (in characters).
-    chunk_overlap (int): The number of overlapping characters between chunks.
-    
+    chunk_size (int): The maximum size of each chunk (in tokens).
+    chunk_overlap (int): The maximum number of overlapping tokens between chunks.
+    length_function (callable): Counts the tokens in a string (defaults to the
+        embedding model's tokenizer).
+
     Returns:
     list of str: A list of text chunks.
     """
+    return list(iter_chunk_text(text, chunk_size, chunk_overlap, length_function))
+
+
+def chunk_pages(pages, chunk_size, chunk_overlap, length_function=None):
+    """
+    Chunks a document across page breaks, recording where each chunk comes from.
+
+    The pages are chunked as one text, so a sentence or species record running
+    over a page break stays in one chunk.
+
+    Parameters:
+    pages (list of str): Cleaned text of each page.
+    chunk_size (int): The maximum size of each chunk (in tokens).
+    chunk_overlap (int): The maximum number of overlapping tokens between chunks.
+    length_function (callable): Counts the tokens in a string (defaults to the
+        embedding model's tokenizer).
+
+    Returns:
+    list of dict: Chunks with "text", "page" and "end_page" (1-based numbers of the
+    pages the chunk starts and ends on) and "offset" (character offset of the chunk
+    in the text of its first page, or -1 if it could not be located) keys.
+    """
+    numbers, starts, texts = [], [], []
+    position = 0
+    for page_number, page in enumerate(pages, start=1):
+        page = page.strip()
+        if page:
+            numbers.append(page_number)
+            starts.append(position)
+            texts.append(page)
+            position += len(page) + 1
+    document = " ".join(texts)
+
     chunks = []
-    
-    # Clean up text by removing excessive whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Start splitting the text into chunks
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        
-        # Append the chunk to our list of chunks
-        chunks.append(chunk.strip())
-        
-        # Move the start position by chunk_size minus the overlap
-        start += chunk_size - chunk_overlap
-    
+    search_from = 0
+    for chunk in iter_chunk_text(document, chunk_size, chunk_overlap, length_function):
+        offset = document.find(chunk, search_from)
+        # A chunk that cannot be located is attributed to where the previous one started
+        start = offset if offset != -1 else max(search_from - 1, 0)
+        if offset != -1:
+            search_from = offset + 1
+        first = bisect_right(starts, start) - 1
+        last = bisect_right(starts, start + len(chunk) - 1) - 1
+        chunks.append({
+            "text": chunk,
+            "page": numbers[first],
+            "end_page": numbers[max(first, last)],
+            "offset": offset - starts[first] if offset != -1 else -1,
+        })
     return chunks
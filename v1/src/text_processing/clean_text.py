@@ -1,24 +1,234 @@
 # src/text_processing/clean_text.py
 
 import re
+from collections import Counter
+
+LIGATURES = {
+    "ﬀ": "ff",
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬅ": "st",
+    "ﬆ": "st",
+}
+
+# (name, pattern, replacement) triples. Replacements are strings or callables taking
+# the matched text.
+DEFAULT_RULES = [
+    # Words hyphenated across a line break: "threat-\nened" -> "threatened"
+    ("hyphenation", r"(?<=\w)-[ \t]*\r?\n\s*(?=\w)", ""),
+    ("ligature", "[" + "".join(LIGATURES) + "]", lambda text: LIGATURES[text]),
+    # Dashes not attached to a word, e.g. bullet points
+    ("dash", r"(?<!\w)-\s+", ""),
+    # Whitespace runs; single spaces already are normalized, so they are not matched
+    ("whitespace", r"[^\S ]\s*| \s+", " "),
+]
+
+# Lines that only hold a page number, e.g. "12", "Page 12" or "12 / 240"
+PAGE_NUMBER_RE = re.compile(r"(?:page\s*)?\d{1,4}(?:\s*(?:/|of)\s*\d{1,4})?", re.IGNORECASE)
+
+# How many lines at the top and bottom of a page are checked for headers and footers
+EDGE_LINES = 2
+
+
+def _edge_key(line):
+    """
+    Normalizes a header/footer line so running page numbers compare equal.
+    """
+    return re.sub(r"\d+", "#", line.strip().lower())
+
+
+class CleaningPipeline:
+    """
+    Applies a list of regex cleaning rules in one fused pass over the text.
+
+    The rules are compiled once into a single alternation, so each page is scanned
+    and copied once no matter how many rules there are. Pages are cleaned
+    independently, so they can be mapped over an executor or cached.
+    """
+
+    def __init__(self, rules=None, remove_headers=True):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.remove_headers = remove_headers
+        alternatives = []
+        replacements = [None]  # Indexed by group number; group 0 is the whole match
+        for name, pattern, replacement in self.rules:
+            alternatives.append(f"(?P<{name}>{pattern})")
+            replacements.append(replacement)
+            # Unnamed groups inside the rule shift the numbering of the next rule
+            replacements.extend([None] * re.compile(pattern).groups)
+        self._pattern = re.compile("|".join(alternatives))
+        self._replacements = replacements
+
+    def _replace(self, match):
+        replacement = self._replacements[match.lastindex]
+        return replacement if isinstance(replacement, str) else replacement(match.group())
+
+    def apply(self, text):
+        """
+        Runs the fused rules over the text without stripping its ends.
+        """
+        return self._pattern.sub(self._replace, text)
+
+    def clean(self, text):
+        """
+        Cleans a piece of text.
+
+        Parameters:
+        text (str): Raw extracted text.
+
+        Returns:
+        str: Cleaned text.
+        """
+        return self.apply(text).strip()
+
+    def strip_edges(self, page, repeated_edges=frozenset()):
+        """
+        Removes page-number lines and known headers/footers from the top and bottom of a page.
+
+        Parameters:
+        page (str): Raw text of one page.
+        repeated_edges (set of str): Normalized edge lines (see `find_repeated_edges`) to remove.
+
+        Returns:
+        str: The page without its header and footer lines.
+        """
+        start, removed = 0, 0
+        while start < len(page):
+            end = page.find("\n", start)
+            end = len(page) if end == -1 else end
+            line = page[start:end]
+            if line.strip():
+                if removed == EDGE_LINES or not self._is_edge_line(line, repeated_edges):
+                    break
+                removed += 1
+            start = end + 1
+
+        stop, removed = len(page), 0
+        while stop > start:
+            begin = max(page.rfind("\n", start, stop), start - 1)
+            line = page[begin + 1:stop]
+            if line.strip():
+                if removed == EDGE_LINES or not self._is_edge_line(line, repeated_edges):
+                    break
+                removed += 1
+            stop = begin
+
+        return page[start:stop] if start < stop else ""
+
+    @staticmethod
+    def _is_edge_line(line, repeated_edges):
+        stripped = line.strip()
+        return PAGE_NUMBER_RE.fullmatch(stripped) is not None or _edge_key(line) in repeated_edges
+
+    @staticmethod
+    def find_repeated_edges(pages, min_share=0.5, min_pages=3):
+        """
+        Finds header/footer lines: edge lines repeated on at least `min_share` of the pages.
+
+        Parameters:
+        pages (list of str): Raw text of every page.
+        min_share (float): Fraction of pages an edge line must appear on.
+        min_pages (int): Minimum number of pages an edge line must appear on.
+
+        Returns:
+        set of str: Normalized edge lines.
+        """
+        counts = Counter()
+        for page in pages:
+            lines = [line for line in page.strip().split("\n") if line.strip()]
+            counts.update({_edge_key(line) for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:]})
+        threshold = max(min_pages, min_share * len(pages))
+        return {line for line, count in counts.items() if count >= threshold}
+
+    def clean_page(self, page, repeated_edges=frozenset()):
+        """
+        Cleans the text of a single page, removing its header and footer first.
+        """
+        if self.remove_headers:
+            page = self.strip_edges(page, repeated_edges)
+        return self.clean(page)
+
+    def clean_pages(self, pages, executor=None):
+        """
+        Cleans a document page by page.
+
+        Parameters:
+        pages (list of str): Raw text of every page.
+        executor (concurrent.futures.Executor): Optional executor to clean pages in parallel.
+
+        Returns:
+        list of str: Cleaned text of every page.
+        """
+        repeated_edges = self.find_repeated_edges(pages) if self.remove_headers else frozenset()
+        mapper = executor.map if executor is not None else map
+        return list(mapper(self.clean_page, pages, [repeated_edges] * len(pages)))
+
+
+DEFAULT_PIPELINE = CleaningPipeline()
+
 
 def clean_text(text):
     """
     Cleans extracted text by removing unnecessary whitespace, special characters, and formatting artifacts.
-    
+
     Parameters:
     text (str): Raw extracted text from PDF.
-    
+
     Returns:
     str: Cleaned text.
     """
-    # Remove excessive whitespace and line breaks
-    text = re.sub(r'\s+', ' ', text)
+    return DEFAULT_PIPELINE.clean(text)
+
+
+def _safe_cut(text):
+    """
+    Finds the last position where `text` can be split without changing what the
+    cleaning rules do on either side: between two characters that are neither
+    whitespace nor a hyphen. Returns 0 if there is none.
+    """
+    for i in range(len(text) - 1, 0, -1):
+        left, right = text[i - 1], text[i]
+        if not (left.isspace() or right.isspace() or left == "-" or right == "-"):
+            return i
+    return 0
+
+
+def iter_clean_text(pages, pipeline=None):
+    """
+    Incrementally cleans a stream of pages, giving the same result as `clean_text`
+    on their concatenation once page-number lines are removed from each page.
+
+    The end of each page after the last safe split point is carried over to the
+    next page, so whitespace runs and hyphens spanning a page break are handled.
 
-    # Optionally, remove or normalize special characters (e.g., hyphens at line breaks)
-    text = re.sub(r'(?<!\w)-\s+', '', text)  # Removes hyphens at the end of lines
+    Parameters:
+    pages (iterable of str): Raw page texts, in document order.
+    pipeline (CleaningPipeline): Pipeline to apply (defaults to the standard rules).
+
+    Yields:
+    str: Cleaned text pieces whose concatenation is the cleaned document.
+    """
+    pipeline = pipeline or DEFAULT_PIPELINE
+    carry = ""
+    at_start = True
+    for page in pages:
+        if pipeline.remove_headers:
+            page = pipeline.strip_edges(page) + "\n"
+        buffer = carry + page
+        cut = _safe_cut(buffer)
+        if cut == 0:
+            carry = buffer
+            continue
+        head, carry = buffer[:cut], buffer[cut:]
+        cleaned = pipeline.apply(head)
+        if at_start:
+            cleaned = cleaned.lstrip()
+            at_start = not cleaned
+        if cleaned:
+            yield cleaned
 
-    # Strip leading and trailing whitespace
-    text = text.strip()
-    
-    return text
+    tail = pipeline.clean(carry) if at_start else pipeline.clean("x" + carry)[1:]
+    if tail:
+        yield tail
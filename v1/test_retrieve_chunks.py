@@ -13,7 +13,7 @@ query_text = "List all"
 # Step 1: Extract, clean, and chunk text
 raw_text = extract_text_from_pdf(file_path)
 cleaned_text = clean_text(raw_text)
-chunks = chunk_text(cleaned_text, chunk_size=500, chunk_overlap=50)
+chunks = chunk_text(cleaned_text, chunk_size=250, chunk_overlap=50)
     
 # Step 2: Initialize ChromaDB collection and add chunks
 collection = initialize_chroma_collection("test_document_chunks")
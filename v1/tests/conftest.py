@@ -0,0 +1,103 @@
+# tests/conftest.py
+#
+# Run from the v1 directory:
+#     python -m pytest tests
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for the Ollama HTTP API.
+
+    /api/embed returns a 2-dimensional vector per input ([len(text), index]) and
+    fails once with HTTP 500 for each input containing "fail-once".
+
+    /api/generate streams the answer "answer to <prompt>" as NDJSON, one word per
+    message, after `server.delay` seconds. `server.active` counts the requests in
+    progress and `server.max_active` the most seen at once.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, body))
+        if self.path == "/api/embed":
+            self._embed(body)
+        elif self.path == "/api/generate":
+            self._generate(body)
+        else:
+            self._send_json(404, {"error": f"unknown endpoint {self.path}"})
+
+    def _embed(self, body):
+        server = self.server
+        inputs = body.get("input", [])
+        with server.lock:
+            failing = [text for text in inputs if "fail-once" in text and text not in server.failed]
+            server.failed.update(failing)
+        if failing:
+            self._send_json(500, {"error": "temporary failure"})
+            return
+        self._send_json(200, {"model": body.get("model"), "embeddings": [[float(len(text)), float(i)] for i, text in enumerate(inputs)]})
+
+    def _generate(self, body):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            words = f"answer to {body.get('prompt', '')}".split(" ")
+            messages = [{"model": body.get("model"), "response": word + " ", "done": False} for word in words[:-1]]
+            messages.append({"model": body.get("model"), "response": words[-1], "done": False})
+            messages.append({"model": body.get("model"), "response": "", "done": True, "eval_count": len(words), "eval_duration": 1000})
+        finally:
+            with server.lock:
+                server.active -= 1
+        data = "".join(json.dumps(message) + "\n" for message in messages).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def fake_ollama():
+    """
+    Runs a fake Ollama server on a free local port; yields the server, whose
+    `base_url` points at it and whose `requests` lists (path, JSON body) pairs.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.failed = set()
+    server.delay = 0.0
+    server.active = 0
+    server.max_active = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
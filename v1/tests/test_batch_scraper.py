@@ -0,0 +1,29 @@
+# tests/test_batch_scraper.py
+
+import os
+
+import batch_scraper
+
+
+def test_parts_of_another_parser_version_are_stale(tmp_path, monkeypatch):
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF")
+    parts_dir = str(tmp_path / "parts")
+    os.makedirs(parts_dir)
+    batch_scraper.write_part(str(pdf), [], parts_dir)
+    old_part = batch_scraper.part_path(str(pdf), parts_dir)
+    assert batch_scraper.is_up_to_date(str(pdf), parts_dir)
+
+    monkeypatch.setattr(batch_scraper, "PARSER_VERSION", "changed")
+
+    assert not batch_scraper.is_up_to_date(str(pdf), parts_dir)
+    assert batch_scraper.merge_parts([str(pdf)], parts_dir, str(tmp_path / "out.csv")) == 0
+    batch_scraper.write_part(str(pdf), [{"Page": 1, "Scientific Name": "Bubo bubo"}], parts_dir)
+    assert os.listdir(parts_dir) == [os.path.basename(batch_scraper.part_path(str(pdf), parts_dir))]
+    assert not os.path.exists(old_part)
+    assert batch_scraper.merge_parts([str(pdf)], parts_dir, str(tmp_path / "out.csv")) == 1
+
+
+def test_parser_version_follows_the_parser_source():
+    assert batch_scraper.PARSER_VERSION == batch_scraper._parser_version()
+    assert len(batch_scraper.PARSER_VERSION) == 8
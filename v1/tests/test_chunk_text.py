@@ -0,0 +1,51 @@
+# tests/test_chunk_text.py
+
+from src.text_processing.chunk_text import (
+    TokenCounter,
+    _approximate_token_spans,
+    approximate_token_count,
+    chunk_pages,
+    chunk_text,
+)
+
+
+def test_chunk_pages_keeps_records_across_page_breaks():
+    pages = [
+        "Intro text here. Scientific Name: Aquila chrysaetos (Linnaeus, 1758) lives in",
+        "",
+        "the mountains of Europe. Scientific Name: Bubo bubo is an owl.",
+    ]
+
+    chunks = chunk_pages(pages, 30, 0, approximate_token_count)
+
+    record = next(chunk for chunk in chunks if "Aquila" in chunk["text"])
+    assert "lives in the mountains of Europe." in record["text"]
+    assert (record["page"], record["end_page"]) == (1, 3)
+    assert pages[0][record["offset"]:].startswith(record["text"][:20])
+
+
+def test_chunk_pages_records_start_page_and_offset():
+    pages = ["First page sentence.", "Second page sentence. Another one here."]
+
+    chunks = chunk_pages(pages, 5, 0, approximate_token_count)
+
+    assert [(chunk["text"], chunk["page"], chunk["end_page"], chunk["offset"]) for chunk in chunks] == [
+        ("First page sentence.", 1, 1, 0),
+        ("Second page sentence.", 2, 2, 0),
+        ("Another one here.", 2, 2, 22),
+    ]
+
+
+def test_long_segments_are_tokenized_once():
+    calls = []
+
+    def spans(text):
+        calls.append(text)
+        return _approximate_token_spans(text)
+
+    counter = TokenCounter(approximate_token_count, spans)
+    segment = " ".join(f"word{i}, more" for i in range(40)) + " " + "x" * 50 + " tail"
+
+    assert chunk_text(segment, 7, 0, counter) == chunk_text(segment, 7, 0, approximate_token_count)
+    assert calls == [segment]
+    assert all(approximate_token_count(chunk) <= 7 for chunk in chunk_text(segment, 7, 0, counter))
@@ -0,0 +1,53 @@
+# tests/test_embedding_cache.py
+
+import json
+import os
+
+import numpy as np
+
+from src.embeddings.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class PrefixEmbeddings:
+    """Embeds queries differently from documents, as models with query prefixes do."""
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 0.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+def test_rows_appended_by_another_process_are_found(tmp_path):
+    reader = EmbeddingCache("model", str(tmp_path))
+    writer = EmbeddingCache("model", str(tmp_path))  # Stands in for another process
+
+    assert reader.get_many(["a"]) == [None]
+    writer.put_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    found = reader.get_many(["b", "a", "c"])
+
+    assert [None if vector is None else vector.tolist() for vector in found] == [[3.0, 4.0], [1.0, 2.0], None]
+
+    writer.put_many(["c"], [[5.0, 6.0]])
+    assert reader.get_many(["c"])[0].tolist() == [5.0, 6.0]
+    assert len(reader) == 3
+
+
+def test_meta_file_is_written_once_under_the_lock(tmp_path):
+    first = EmbeddingCache("model", str(tmp_path))
+    second = EmbeddingCache("model", str(tmp_path))
+    first.put_many(["a"], np.ones((1, 3)))
+    second.put_many(["b"], np.zeros((1, 3)))
+
+    with open(first.meta_path) as f:
+        assert json.load(f) == {"model": "model", "dim": 3}
+    assert not [name for name in os.listdir(first.directory) if name.endswith(".tmp")]
+    assert second.dim == 3 and len(second) == 2
+
+
+def test_queries_use_the_query_embedding(tmp_path):
+    embeddings = CachedEmbeddings(PrefixEmbeddings(), "model", cache=EmbeddingCache("model", str(tmp_path)))
+
+    assert embeddings.embed_queries(["abc", "de", "abc"]) == [[3.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert embeddings.embed_queries(["de"]) == [embeddings.embed_query("de")]
+    assert embeddings.embed_documents(["abc"]) == [[3.0, 0.0]]
@@ -0,0 +1,42 @@
+# tests/test_embedding_service.py
+
+import asyncio
+
+from src.embeddings.embedding_service import EmbeddingService
+
+
+def test_embed_batches_in_order(fake_ollama):
+    service = EmbeddingService(fake_ollama.base_url, model="fake", batch_size=3, concurrency=2)
+    chunks = [f"chunk {'x' * i}" for i in range(10)]
+
+    vectors = service.embed(chunks)
+
+    assert [vector[0] for vector in vectors] == [float(len(chunk)) for chunk in chunks]
+    batches = [body["input"] for path, body in fake_ollama.requests if path == "/api/embed"]
+    assert sorted(len(batch) for batch in batches) == [1, 3, 3, 3]
+
+
+def test_failed_batch_is_retried_alone(fake_ollama):
+    service = EmbeddingService(fake_ollama.base_url, model="fake", batch_size=2, max_retries=2)
+    chunks = ["a", "b", "c fail-once", "d", "e", "f"]
+
+    vectors = service.embed(chunks)
+
+    assert [vector[0] for vector in vectors] == [float(len(chunk)) for chunk in chunks]
+    batches = [tuple(body["input"]) for _, body in fake_ollama.requests]
+    assert batches.count(("c fail-once", "d")) == 2
+    assert batches.count(("a", "b")) == batches.count(("e", "f")) == 1
+
+
+def test_keep_alive_is_sent(fake_ollama):
+    service = EmbeddingService(fake_ollama.base_url, model="fake", keep_alive="5m")
+    service.embed(["a"])
+    assert fake_ollama.requests[0][1]["keep_alive"] == "5m"
+
+
+def test_clients_of_finished_event_loops_are_dropped(fake_ollama):
+    service = EmbeddingService(fake_ollama.base_url, model="fake")
+    for _ in range(5):
+        asyncio.run(service.aembed(["a", "b"]))
+    # Only the client of the last loop is left until the next lookup
+    assert len(service._clients) <= 1
@@ -0,0 +1,54 @@
+# tests/test_generate_many.py
+
+import asyncio
+import logging
+
+from src.answer_generation.generate_answer import generate_answer, generate_many
+from src.answer_generation.ollama_client import get_async_ollama_client, get_ollama_client
+from src.answer_generation.response_cache import ResponseCache
+
+
+def test_generate_many_bounds_concurrency_and_keeps_order(fake_ollama):
+    fake_ollama.delay = 0.05
+    prompts = [f"question {i}" for i in range(8)]
+
+    answers = asyncio.run(generate_many(prompts, "fake", base_url=fake_ollama.base_url, concurrency=3, use_cache=False))
+
+    assert answers == [f"answer to {prompt}" for prompt in prompts]
+    assert fake_ollama.max_active == 3
+    assert sorted(body["prompt"] for _, body in fake_ollama.requests) == sorted(prompts)
+
+
+def test_generate_many_reports_errors_in_place(fake_ollama):
+    answers = asyncio.run(generate_many(["ok"], "fake", base_url=fake_ollama.base_url + "/missing", use_cache=False))
+
+    assert answers == ["Error connecting to Ollama API."]
+
+
+def test_generate_many_reuses_one_client_per_loop(fake_ollama):
+    client = get_async_ollama_client(fake_ollama.base_url)
+
+    async def run():
+        await generate_many(["a", "b", "c"], "fake", base_url=fake_ollama.base_url, concurrency=2, use_cache=False)
+        return len(client._clients)
+
+    assert asyncio.run(run()) == 1
+    asyncio.run(run())
+    assert len(client._clients) == 1
+
+
+def test_cached_answers_are_logged_without_timings(fake_ollama, tmp_path, monkeypatch, caplog):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(get_ollama_client(fake_ollama.base_url), "cache", cache)
+    monkeypatch.setattr(get_async_ollama_client(fake_ollama.base_url), "cache", cache)
+
+    with caplog.at_level(logging.INFO):
+        first = generate_answer(fake_ollama.base_url, "question", "fake")
+        logged = len(caplog.messages)
+        again = generate_answer(fake_ollama.base_url, "question", "fake")
+        [async_again] = asyncio.run(generate_many(["question"], "fake", base_url=fake_ollama.base_url))
+
+    assert first == again == async_again == "answer to question"
+    assert len(fake_ollama.requests) == 1
+    assert "tokens/s" in caplog.messages[logged - 1]
+    assert caplog.messages[logged:] == ["fake: cached response"] * 2
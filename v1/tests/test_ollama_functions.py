@@ -0,0 +1,222 @@
+# tests/test_ollama_functions.py
+
+import asyncio
+import json
+import warnings
+from typing import List
+
+import pytest
+from langchain_community.chat_models.ollama import ChatOllama
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import BaseModel
+
+from src.extensions.ollama_functions import (
+    DEFAULT_RESPONSE_FUNCTION,
+    OllamaFunctions,
+    convert_to_ollama_tool,
+    tools_to_json_schema,
+)
+
+
+class Species(BaseModel):
+    """A species and its Red List category."""
+
+    name: str
+    category: str
+
+
+class Habitat(BaseModel):
+    """Where a species lives."""
+
+    habitat: str
+
+
+class Assessment(BaseModel):
+    category: str
+    year: int
+
+
+class Record(BaseModel):
+    """A species record with its assessments."""
+
+    name: str
+    assessments: List[Assessment]
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """
+    Stubs the Ollama chat model under OllamaFunctions: each call answers with
+    `replies[prompt]` (a JSON-serializable value) for the last message, and is
+    recorded in `calls` as (messages, kwargs).
+    """
+    replies = {}
+    calls = []
+
+    def reply(messages, kwargs):
+        calls.append((messages, kwargs))
+        content = replies[messages[-1].content]
+        if isinstance(content, Exception):
+            raise content
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps(content)))])
+
+    def generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return reply(messages, kwargs)
+
+    async def agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(0.01 * (len(calls) % 3))  # Replies arrive out of order
+        return reply(messages, kwargs)
+
+    monkeypatch.setattr(ChatOllama, "_generate", generate)
+    monkeypatch.setattr(ChatOllama, "_agenerate", agenerate)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        llm = OllamaFunctions(model="fake")
+    return llm, replies, calls
+
+
+def test_sync_and_async_calls_match(chat):
+    llm, replies, calls = chat
+    replies["Which species?"] = {"tool": "Species", "tool_input": {"name": "Spizaetus isidori", "category": "EN"}}
+    bound = llm.bind_tools([Species, Habitat])
+
+    sync_message = bound.invoke("Which species?")
+    async_message = asyncio.run(bound.ainvoke("Which species?"))
+
+    for message in (sync_message, async_message):
+        assert message.content == ""
+        assert [(call["name"], call["args"]) for call in message.tool_calls] == [
+            ("Species", {"name": "Spizaetus isidori", "category": "EN"})
+        ]
+    (sync_messages, sync_kwargs), (async_messages, async_kwargs) = calls
+    assert sync_messages == async_messages
+    assert sync_kwargs == async_kwargs
+    assert "functions" not in sync_kwargs and "function_call" not in sync_kwargs and "format" not in sync_kwargs
+    tools = sync_messages[0].content
+    assert "Species" in tools and "Habitat" in tools and DEFAULT_RESPONSE_FUNCTION["name"] in tools
+
+
+def test_conversational_reply_without_tool(chat):
+    llm, replies, _ = chat
+    replies["Hello"] = {"response": "Hi there"}
+    replies["Hi"] = {"tool": DEFAULT_RESPONSE_FUNCTION["name"], "tool_input": {"response": "Hello"}}
+    bound = llm.bind_tools([Species])
+
+    assert bound.invoke("Hello").content == "Hi there"
+    assert asyncio.run(bound.ainvoke("Hi")).content == "Hello"
+
+
+def test_missing_tool_input_gives_empty_arguments(chat):
+    llm, replies, _ = chat
+    replies["Which species?"] = {"tool": "Species"}
+
+    message = llm.bind_tools([Species]).invoke("Which species?")
+
+    assert [(call["name"], call["args"]) for call in message.tool_calls] == [("Species", {})]
+
+
+@pytest.mark.parametrize("reply", [{"tool_input": {"name": "x"}}, {"tool": "Unknown"}, ["not", "an", "object"]])
+def test_reply_without_usable_tool_is_an_error(chat, reply):
+    llm, replies, _ = chat
+    replies["Which species?"] = reply
+
+    with pytest.raises(ValueError, match="Failed to parse a response"):
+        llm.bind_tools([Species]).invoke("Which species?")
+    with pytest.raises(ValueError, match="Failed to parse a response"):
+        asyncio.run(llm.bind_tools([Species]).ainvoke("Which species?"))
+
+
+def test_function_call_selects_a_pydantic_tool(chat):
+    llm, replies, calls = chat
+    replies["Where?"] = {"tool": "Habitat", "tool_input": {"habitat": "forest"}}
+
+    message = llm.bind_tools([Species, Habitat], function_call={"name": "Habitat"}).invoke("Where?")
+
+    assert message.tool_calls[0]["args"] == {"habitat": "forest"}
+    tools = calls[0][0][0].content
+    assert "Habitat" in tools and '"Species"' not in tools
+    with pytest.raises(ValueError, match="matching function"):
+        llm.bind_tools([Species], function_call={"name": "Habitat"}).invoke("Where?")
+
+
+def test_structured_output_with_pydantic_schema(chat):
+    llm, replies, _ = chat
+    replies["Which species?"] = {"tool": "Species", "tool_input": {"name": "Spizaetus isidori", "category": "EN"}}
+
+    result = llm.with_structured_output(Species).invoke("Which species?")
+
+    assert result == Species(name="Spizaetus isidori", category="EN")
+
+
+def test_aextract_many_keeps_input_order(chat):
+    llm, replies, _ = chat
+    prompts = [f"Species {i}?" for i in range(6)]
+    for i, prompt in enumerate(prompts):
+        replies[prompt] = {"tool": "Species", "tool_input": {"name": f"species {i}", "category": "LC"}}
+
+    results = asyncio.run(llm.aextract_many(prompts, Species, max_concurrency=3))
+
+    assert [result.name for result in results] == [f"species {i}" for i in range(6)]
+
+
+def test_aextract_many_errors(chat):
+    llm, replies, _ = chat
+    replies["good"] = {"tool": "Species", "tool_input": {"name": "Spizaetus isidori", "category": "EN"}}
+    replies["bad json"] = "not a tool call"
+    replies["server down"] = ConnectionError("server down")
+    prompts = ["good", "bad json", "server down"]
+
+    results = asyncio.run(llm.aextract_many(prompts, Species, return_exceptions=True))
+
+    assert results[0] == Species(name="Spizaetus isidori", category="EN")
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], ConnectionError)
+    with pytest.raises(ConnectionError):
+        asyncio.run(llm.aextract_many(["good", "server down"], Species))
+
+
+def test_converted_pydantic_tools_are_independent_copies():
+    tool = convert_to_ollama_tool(Species)
+    tool["parameters"]["properties"].clear()
+    tool["parameters"]["required"].append("habitat")
+
+    again = convert_to_ollama_tool(Species)
+
+    assert set(again["parameters"]["properties"]) == {"name", "category"}
+    assert again["parameters"]["required"] == ["name", "category"]
+
+
+def test_tools_to_json_schema_hoists_nested_definitions():
+    record = convert_to_ollama_tool(Record)
+
+    schema = tools_to_json_schema([record, DEFAULT_RESPONSE_FUNCTION])
+
+    assert set(schema["$defs"]) == {"Assessment"}
+    record_variant, response_variant = schema["anyOf"]
+    assert record_variant["properties"]["tool"] == {"type": "string", "enum": ["Record"]}
+    assert "$defs" not in record_variant["properties"]["tool_input"]
+    assert record_variant["properties"]["tool_input"]["properties"]["assessments"]["items"] == {"$ref": "#/$defs/Assessment"}
+    assert response_variant["properties"]["tool_input"] == DEFAULT_RESPONSE_FUNCTION["parameters"]
+    assert "$defs" in record["parameters"]  # The converted tool is left as is
+    assert tools_to_json_schema([DEFAULT_RESPONSE_FUNCTION]) == response_variant
+
+
+def test_json_schema_format_mode_sends_format_and_compact_prompt(chat):
+    llm, replies, calls = chat
+    llm = llm.model_copy(update={"use_json_schema_format": True})
+    replies["Which record?"] = {"tool": "Record", "tool_input": {"name": "Bubo bubo", "assessments": [{"category": "LC", "year": 2021}]}}
+
+    sync_message = llm.bind_tools([Record, Habitat]).invoke("Which record?")
+    async_message = asyncio.run(llm.bind_tools([Record, Habitat]).ainvoke("Which record?"))
+
+    (messages, kwargs), (async_messages, async_kwargs) = calls
+    expected = tools_to_json_schema([convert_to_ollama_tool(Record), convert_to_ollama_tool(Habitat), DEFAULT_RESPONSE_FUNCTION])
+    assert kwargs["format"] == async_kwargs["format"] == expected
+    prompt = messages[0].content
+    assert "- Record: A species record with its assessments." in prompt
+    assert "- Habitat: Where a species lives." in prompt
+    assert "properties" not in prompt and "$defs" not in prompt
+    assert async_messages[0].content == prompt
+    for message in (sync_message, async_message):
+        assert message.tool_calls[0]["args"]["assessments"] == [{"category": "LC", "year": 2021}]
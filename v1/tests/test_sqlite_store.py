@@ -0,0 +1,67 @@
+# tests/test_sqlite_store.py
+
+import asyncio
+import threading
+
+from src.answer_generation.ollama_client import AsyncOllamaClient
+from src.answer_generation.response_cache import ResponseCache
+from src.pdf_processing.extraction_cache import ExtractionCache
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_bytes=10 ** 6)
+    for key in ("a", "b", "c"):
+        cache.put(key, "fake", {"text": key * 1000})
+    cache.get("a")
+    cache.max_bytes = cache.stats()["bytes"] - 1
+
+    cache.put("d", "fake", {"text": "d"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+
+
+def test_response_cache_purges_expired_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=-1)
+    cache.put("a", "fake", {"text": "a"})
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_extraction_cache_evicts_documents_with_their_pages(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "pages.sqlite3"))
+    cache.put_pages("old", [{"page": 1, "text": "x" * 5000}], page_count=1)
+    cache.put_pages("new", [{"page": 1, "text": "y" * 5000}], page_count=1)
+    cache.max_bytes = cache.stats()["bytes"] - 1
+
+    cache.put_pages("new", [{"page": 2, "text": "z"}], page_count=2)
+
+    assert cache.get_page("old", 1) is None
+    assert cache.get_pages("new") is not None
+    assert cache.stats()["documents"] == 1
+    cache.clear()
+    assert cache.stats() == {"documents": 0, "bytes": 0, "max_bytes": cache.max_bytes}
+
+
+def test_async_client_uses_the_cache_off_the_event_loop(fake_ollama, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    threads = []
+    get, put = cache.get, cache.put
+    cache.get = lambda *args: threads.append(threading.current_thread()) or get(*args)
+    cache.put = lambda *args: threads.append(threading.current_thread()) or put(*args)
+    client = AsyncOllamaClient(fake_ollama.base_url, cache=cache)
+
+    async def run():
+        first = await client.generate("fake", "question")
+        second = await client.generate("fake", "question")
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.text == second.text == "answer to question"
+    assert len([path for path, _ in fake_ollama.requests if path == "/api/generate"]) == 1
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads